@@ -1,13 +1,26 @@
-from fastapi import FastAPI,Request
+from fastapi import FastAPI,Request,HTTPException
 import uvicorn
+from functools import lru_cache
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from fastapi.concurrency import run_in_threadpool
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
+from src.forest.entity.model_cache import ModelCache
+from src.forest.logger import logging
 from src.forest.pipeline.training_pipeline import TrainPipeline
 from src.forest.pipeline.prediction_pipeline import PredictionPipeline
+from src.forest.pipeline.job_manager import Job, JobManager, JOB_FAILED, JOB_SUCCEEDED
+from src.forest.pipeline.micro_batcher import MicroBatcher
 
 
 app = FastAPI()
+job_manager = JobManager()
+# warm up runs on its own worker, queued training or batch prediction jobs never hold back readiness
+warm_up_manager = JobManager(max_workers=1)
+micro_batcher: Optional[MicroBatcher] = None
+warm_up_job: Optional[Job] = None
 TEMPLATES = Jinja2Templates(directory='templates')
 
 origins = ["*"]
@@ -27,12 +40,12 @@ async def index(request: Request):
 
 @app.get("/train")
 async def trainRouteClient():
+    """
+    Starts a training run in the background, while one is queued or running its job is returned
+    """
     try:
-        train_pipeline = TrainPipeline()
-
-        train_pipeline.run_pipeline()
-
-        return Response("<h1>Training successful !!<h1>")
+        job = job_manager.submit("train", lambda: TrainPipeline().run_pipeline(), deduplicate=True)
+        return {"job_id": job.job_id, "status": job.status}
 
     except Exception as e:
         return Response(f"Error Occurred! {e}")
@@ -40,17 +53,124 @@ async def trainRouteClient():
 
 @app.get("/predict")
 async def predictRouteClient():
+    """
+    Starts a streaming batch prediction of the S3 input file in the background
+    """
     try:
-        prediction_pipeline = PredictionPipeline()
+        job = job_manager.submit("predict", lambda: PredictionPipeline().initiate_streaming_prediction())
+        return {"job_id": job.job_id, "status": job.status}
+
+    except Exception as e:
+        return Response(f"Error Occurred! {e}")
+
+
+@app.get("/jobs/{job_id}")
+async def jobStatusRouteClient(job_id: str):
+    job = job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job
+
+
+@app.on_event("shutdown")
+def shutdown_job_manager():
+    job_manager.shutdown(wait=False)
+    warm_up_manager.shutdown(wait=False)
+    ModelCache.unwatch()
 
-        prediction_pipeline.initiate_prediction()
 
-        return Response(
-            "<h1>Prediction successful and predictions are stored in s3 bucket !!<h1>"
-        )
+class OnlinePredictionRequest(BaseModel):
+    rows: List[Dict[str, Optional[float]]]
+    return_probabilities: bool = False
 
+
+@lru_cache(maxsize=None)
+def get_prediction_pipeline() -> PredictionPipeline:
+    return PredictionPipeline()
+
+
+def prepare_online_rows(rows: List[Dict[str, Optional[float]]]):
+    """
+    Validation errors of the rows, or their feature values when they are valid
+    """
+    prediction_pipeline = get_prediction_pipeline()
+    errors = prediction_pipeline.validate_rows(rows)
+    return errors, None if errors else prediction_pipeline.get_feature_values(rows)
+
+
+@app.on_event("startup")
+async def start_micro_batcher():
+    global micro_batcher
+    try:
+        # boto3 clients, schema parsing and the validator are built off the event loop before serving
+        await run_in_threadpool(get_prediction_pipeline)
+    except Exception:
+        logging.exception("Prediction pipeline could not be built at startup, retrying on first request")
+    micro_batcher = MicroBatcher(predict_fn=lambda values: get_prediction_pipeline().predict_proba_values(values))
+    micro_batcher.start()
+
+
+@app.on_event("shutdown")
+async def stop_micro_batcher():
+    if micro_batcher is not None:
+        await micro_batcher.stop()
+
+
+def submit_warm_up() -> Job:
+    global warm_up_job
+    warm_up_job = warm_up_manager.submit("warm_up", warm_up_and_watch, deduplicate=True)
+    return warm_up_job
+
+
+def warm_up_and_watch() -> None:
+    prediction_pipeline = get_prediction_pipeline()
+    prediction_pipeline.warm_up()
+    prediction_pipeline.watch_trained_model()
+
+
+@app.on_event("startup")
+async def start_warm_up():
+    submit_warm_up()
+
+
+@app.get("/health/live")
+async def livenessRouteClient():
+    """
+    Reports the process is serving requests, never touches the model
+    """
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readinessRouteClient():
+    """
+    Reports ready once the startup warm up has loaded the registry model and scored a synthetic batch,
+    503 until then. A failed warm up, e.g. before a model was pushed, is retried on the next probe.
+    """
+    job = warm_up_job
+    if job is not None and job.status == JOB_SUCCEEDED:
+        return {"status": "ready"}
+    if job is None or job.status == JOB_FAILED:
+        failed_job, job = job, submit_warm_up()
+        if failed_job is not None:
+            return Response(content=f"Warm up failed: {failed_job.error}", status_code=503)
+    return Response(content=f"Warm up {job.status}", status_code=503)
+
+
+@app.post("/predict/online")
+async def onlinePredictRouteClient(request: OnlinePredictionRequest):
+    """
+    Scores the JSON feature rows with the model held in memory. Rows are validated on the threadpool and
+    rows of concurrent requests are coalesced by the micro batcher into one model call off the event loop.
+    """
+    errors, values = await run_in_threadpool(prepare_online_rows, request.rows)
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+    try:
+        classes, probabilities = await micro_batcher.submit(values)
+        return PredictionPipeline.format_predictions(classes, probabilities, request.return_probabilities)
     except Exception as e:
-        return Response(f"Error Occurred! {e}")
+        raise HTTPException(status_code=500, detail=f"Error Occurred! {e}")
 
 
 if __name__ == "__main__":
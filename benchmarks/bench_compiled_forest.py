@@ -0,0 +1,74 @@
+"""
+Compares the fitted ColumnTransformer and forest of sklearn with the compiled forest engine for several
+batch sizes, and checks the two give bit identical probabilities and predictions. The compiled
+column times the engine itself, ForestModel only uses it up to COMPILED_FOREST_MAX_ROWS rows.
+
+    python benchmarks/bench_compiled_forest.py
+    python benchmarks/bench_compiled_forest.py --model artifacts/model_trainer/trained_model/model.pkl
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_model_serialization import build_model
+from src.forest.entity.estimator import ForestModel, INFERENCE_ENGINE_COMPILED
+from src.forest.utils.main_utils import load_object
+
+
+def best_time(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", help="existing model file, a synthetic forest is trained otherwise")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--min-samples-leaf", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    model = load_object(args.model) if args.model else build_model(args.rows, args.min_samples_leaf)
+    compiled_model = ForestModel(model.preprocessing_object, model.trained_model_object, INFERENCE_ENGINE_COMPILED)
+
+    start = time.perf_counter()
+    compiled_forest = compiled_model.get_compiled_forest()
+    if compiled_forest is None:
+        raise SystemExit("Model is not supported by the compiled forest engine")
+    print(f"compiled {len(compiled_forest.roots)} trees, {len(compiled_forest.threshold)} nodes, "
+          f"max depth {compiled_forest.max_depth} in {time.perf_counter() - start:.2f}s")
+
+    rng = np.random.default_rng(1)
+    columns = compiled_forest.feature_columns
+    statistics = compiled_forest.fill_values
+    print(f"{'rows':>8}{'sklearn ms':>14}{'compiled ms':>14}{'speedup':>10}{'identical':>11}")
+    for batch_size in (1, 10, 100, 1000, 10000, 100000):
+        values = statistics + rng.normal(size=(batch_size, len(columns))) * np.maximum(np.abs(statistics), 1)
+        values[rng.random(values.shape) < 0.01] = np.nan
+        dataframe = pd.DataFrame(values, columns=columns)
+        repeat = args.repeat if batch_size < 100000 else 1
+
+        # the baseline runs the ColumnTransformer itself, ForestModel would use the fused preprocessor
+        sklearn_predict = lambda: model.trained_model_object.predict(model.preprocessing_object.transform(dataframe))
+        sklearn_proba = lambda: model.trained_model_object.predict_proba(model.preprocessing_object.transform(dataframe))
+        compiled_predict = lambda: compiled_forest.predict_values(compiled_forest.get_feature_values(dataframe))
+        compiled_proba = compiled_forest.predict_proba_values(compiled_forest.get_feature_values(dataframe))
+        identical = np.array_equal(sklearn_proba().view(np.int64), compiled_proba.view(np.int64)) and \
+            np.array_equal(sklearn_predict(), compiled_predict())
+        sklearn_seconds = best_time(sklearn_predict, repeat)
+        compiled_seconds = best_time(compiled_predict, repeat)
+        print(f"{batch_size:>8}{sklearn_seconds * 1000:>14.2f}{compiled_seconds * 1000:>14.2f}"
+              f"{sklearn_seconds / compiled_seconds:>10.1f}{str(identical):>11}")
+
+
+if __name__ == "__main__":
+    main()
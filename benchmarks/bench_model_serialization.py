@@ -0,0 +1,103 @@
+"""
+Compares the dill pickle of a ForestModel with the compact model file format on file size,
+load time and resident memory. Every load runs in a fresh interpreter with sklearn already
+imported, memory is the growth of the resident set over that interpreter.
+
+    python benchmarks/bench_model_serialization.py
+    python benchmarks/bench_model_serialization.py --model artifacts/model_trainer/trained_model/model.pkl
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.forest.utils.main_utils import save_object, load_object
+from src.forest.utils.model_serialization import save_model_object
+
+LOAD_SCRIPT = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+import sklearn.compose, sklearn.ensemble, sklearn.impute, sklearn.pipeline, sklearn.preprocessing
+from src.forest.utils.main_utils import load_object
+def status(field):
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith(field)) * 1024
+before = status("VmRSS")
+start = time.perf_counter()
+model = load_object({path!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"load_seconds": elapsed, "rss_bytes": status("VmRSS") - before,
+                   "peak_rss_bytes": status("VmHWM") - before}}))
+"""
+
+
+def build_model(n_rows: int, min_samples_leaf: int):
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+    import pandas as pd
+    from src.forest.entity.estimator import ForestModel
+
+    rng = np.random.default_rng(0)
+    columns = [f"feature_{i}" for i in range(10)]
+    X = pd.DataFrame(rng.normal(size=(n_rows, len(columns))), columns=columns)
+    y = (X["feature_0"] * 3 + X["feature_1"] ** 2 + rng.normal(size=n_rows)).round().clip(-3, 3).astype(int)
+    preprocessor = ColumnTransformer([("Numeric_Pipeline", Pipeline(steps=[
+        ("imputer", SimpleImputer(strategy="mean")), ("scaler", StandardScaler())]), columns)])
+    model = RandomForestClassifier(min_samples_leaf=min_samples_leaf, n_jobs=-1, random_state=0)
+    model.fit(preprocessor.fit_transform(X), y)
+    return ForestModel(preprocessing_object=preprocessor, trained_model_object=model)
+
+
+def measure_load(path: str, repeat: int) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", LOAD_SCRIPT.format(root=root, path=path)],
+                                check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: min(run[key] for run in runs) for key in runs[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", help="existing model file to convert, a synthetic forest is trained otherwise")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--min-samples-leaf", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.model:
+        forest_model = load_object(args.model)
+    else:
+        start = time.perf_counter()
+        forest_model = build_model(args.rows, args.min_samples_leaf)
+        print(f"trained synthetic forest on {args.rows} rows in {time.perf_counter() - start:.1f}s")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = {
+            "dill": os.path.join(tmp_dir, "dill", "model.pkl"),
+            "compact": os.path.join(tmp_dir, "compact", "model.pkl"),
+            "compact+zlib": os.path.join(tmp_dir, "compact_zlib", "model.pkl"),
+        }
+        save_object(paths["dill"], forest_model)
+        save_model_object(paths["compact"], forest_model)
+        save_model_object(paths["compact+zlib"], forest_model, compress=True)
+
+        print(f"{'format':<14}{'size MB':>10}{'load s':>10}{'RSS MB':>10}{'peak RSS MB':>14}")
+        for name, path in paths.items():
+            result = measure_load(path, args.repeat)
+            print(f"{name:<14}{os.path.getsize(path) / 2 ** 20:>10.1f}{result['load_seconds']:>10.3f}"
+                  f"{result['rss_bytes'] / 2 ** 20:>10.1f}{result['peak_rss_bytes'] / 2 ** 20:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
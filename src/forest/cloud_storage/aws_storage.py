@@ -1,43 +1,479 @@
 from logging import exception
 import boto3
+import hashlib
+import tempfile
+import threading
+import time
+from boto3.s3.transfer import TransferConfig
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from src.forest.configuration.aws_connection import S3Client
-from io import StringIO
-from typing import Union,List
+import codecs
+from typing import BinaryIO, TextIO, Callable, Dict, Iterator, Optional, Tuple, Union,List
 import os,sys
 from src.forest.logger import logging
 from mypy_boto3_s3.service_resource import Bucket
 from src.forest.exception import CustomException
 from botocore.exceptions import ClientError
 from pandas import DataFrame,read_csv
-import pickle
+from src.forest.constants.s3_bucket import (S3_CACHE_DIR, S3_CACHE_ENABLED, S3_CACHE_MAX_BYTES,
+                                            S3_METADATA_CACHE_TTL_SECONDS, S3_MULTIPART_PART_SIZE,
+                                            S3_TRANSFER_MAX_CONCURRENCY)
+from src.forest.utils.main_utils import load_object, loads_object
+
+class S3MultipartWriter:
+    """
+    This class is a writable file object streaming to one S3 object through a multipart upload.
+    Written data is buffered until a part of part_size bytes is full and uploaded as soon as it is,
+    up to max_concurrency parts at a time, so memory use is bounded by the parts in flight whatever
+    the size of the object. close completes the upload, abort (or leaving a with block on an
+    exception) cancels it and drops the uploaded parts.
+    """
+
+    def __init__(self, s3_client, bucket_name: str, key: str, part_size: int = S3_MULTIPART_PART_SIZE,
+                 encoding: str = "utf-8", max_concurrency: int = S3_TRANSFER_MAX_CONCURRENCY,
+                 on_complete: Optional[Callable[[], None]] = None):
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.key = key
+        self.part_size = part_size
+        self.encoding = encoding
+        self.on_complete = on_complete
+        self._buffer = bytearray()
+        self._parts: List[dict] = []
+        self._pending = deque()
+        self._max_pending = max(max_concurrency, 1)
+        self._executor = ThreadPoolExecutor(max_workers=self._max_pending, thread_name_prefix="s3-part")
+        self._upload_id = s3_client.create_multipart_upload(Bucket=bucket_name, Key=key)["UploadId"]
+        self.closed = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Union[str, bytes]) -> int:
+        if isinstance(data, str):
+            data = data.encode(self.encoding)
+        self._buffer += data
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def _put_part(self, part_number: int, body: bytes) -> dict:
+        response = self.s3_client.upload_part(Bucket=self.bucket_name, Key=self.key, UploadId=self._upload_id,
+                                              PartNumber=part_number, Body=body)
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+    def _upload_part(self, body: bytes) -> None:
+        part_number = len(self._parts) + len(self._pending) + 1
+        self._pending.append(self._executor.submit(self._put_part, part_number, body))
+        while len(self._pending) >= self._max_pending:
+            self._parts.append(self._pending.popleft().result())
+
+    def _wait_parts(self) -> None:
+        while self._pending:
+            self._parts.append(self._pending.popleft().result())
+
+    def close(self) -> None:
+        """
+        Upload the buffered tail as the last part and complete the upload
+        """
+        if self.closed:
+            return
+        try:
+            if self._buffer or not (self._parts or self._pending):
+                self._upload_part(bytes(self._buffer))
+                self._buffer.clear()
+            self._wait_parts()
+            self._executor.shutdown()
+            self.s3_client.complete_multipart_upload(Bucket=self.bucket_name, Key=self.key, UploadId=self._upload_id,
+                                                     MultipartUpload={"Parts": self._parts})
+            self.closed = True
+            if self.on_complete is not None:
+                self.on_complete()
+        except Exception:
+            self.abort()
+            raise
+
+    def abort(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._buffer.clear()
+        for future in self._pending:
+            future.cancel()
+        self._executor.shutdown()
+        self._pending.clear()
+        self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=self.key, UploadId=self._upload_id)
+
+    def __enter__(self) -> "S3MultipartWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class S3RangeReader:
+    """
+    This class is a readable file object over one S3 object that downloads it as ranged GETs of
+    part_size bytes, max_concurrency of them in flight, and hands the parts to the reader in order.
+    The first part comes with the request that opened the object, later parts are pinned to its ETag
+    with If-Match so a concurrent overwrite fails the read instead of mixing two versions. Memory use
+    is bounded by the parts in flight whatever the size of the object.
+    """
+
+    def __init__(self, s3_client, bucket_name: str, key: str, first_response: dict,
+                 part_size: int = S3_MULTIPART_PART_SIZE, max_concurrency: int = S3_TRANSFER_MAX_CONCURRENCY):
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.key = key
+        self.part_size = part_size
+        self.etag = first_response["ETag"]
+        content_range = first_response.get("ContentRange")
+        self.size = int(content_range.rsplit("/", 1)[1]) if content_range else first_response["ContentLength"]
+        self._buffer = memoryview(first_response["Body"].read())
+        self._next_offset = len(self._buffer)
+        self._pending = deque()
+        self._max_pending = max(max_concurrency, 1)
+        self._executor = ThreadPoolExecutor(max_workers=self._max_pending, thread_name_prefix="s3-range") \
+            if self._next_offset < self.size else None
+        self.closed = False
+        self._fill()
+
+    @classmethod
+    def open(cls, s3_client, bucket_name: str, key: str, part_size: int = S3_MULTIPART_PART_SIZE,
+             max_concurrency: int = S3_TRANSFER_MAX_CONCURRENCY, **get_kwargs) -> "S3RangeReader":
+        """
+        GET the first part of the object with get_kwargs, e.g. IfNoneMatch, and start reading the rest
+        """
+        try:
+            response = s3_client.get_object(Bucket=bucket_name, Key=key, Range=f"bytes=0-{part_size - 1}",
+                                            **get_kwargs)
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "InvalidRange":
+                raise
+            # an empty object has no byte range
+            response = s3_client.get_object(Bucket=bucket_name, Key=key, **get_kwargs)
+        return cls(s3_client, bucket_name, key, response, part_size=part_size, max_concurrency=max_concurrency)
+
+    def _get_range(self, start: int, end: int) -> bytes:
+        response = self.s3_client.get_object(Bucket=self.bucket_name, Key=self.key, Range=f"bytes={start}-{end}",
+                                             IfMatch=self.etag)
+        return response["Body"].read()
+
+    def _fill(self) -> None:
+        while self._next_offset < self.size and len(self._pending) < self._max_pending:
+            end = min(self._next_offset + self.part_size, self.size) - 1
+            self._pending.append(self._executor.submit(self._get_range, self._next_offset, end))
+            self._next_offset = end + 1
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            chunks = [bytes(self._buffer)]
+            self._buffer = memoryview(b"")
+            while self._pending:
+                chunks.append(self._pending.popleft().result())
+                self._fill()
+            return b"".join(chunks)
+        while not len(self._buffer) and self._pending:
+            self._buffer = memoryview(self._pending.popleft().result())
+            self._fill()
+        data = bytes(self._buffer[:size])
+        self._buffer = self._buffer[size:]
+        return data
+
+    def __iter__(self):
+        return iter(lambda: self.read(self.part_size), b"")
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def __enter__(self) -> "S3RangeReader":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class _CachingReader:
+    """
+    Readable file object over an S3 body that copies what is read into a temporary cache file and
+    commits it to the S3ObjectCache once the body was read to the end
+    """
+
+    def __init__(self, body, cache: "S3ObjectCache", key_dir: str, etag: str):
+        self._body = body
+        self._cache = cache
+        self._key_dir = key_dir
+        self._etag = etag
+        self._temp_file = tempfile.NamedTemporaryFile(dir=key_dir, prefix=".", delete=False)
+        self._complete = False
+        self.closed = False
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        read_all = size is None or size < 0
+        data = self._body.read() if read_all else self._body.read(size)
+        self._temp_file.write(data)
+        if read_all or (not data and size != 0):
+            self._complete = True
+        return data
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._body.close()
+        self._temp_file.close()
+        if self._complete:
+            self._cache.commit(self._key_dir, self._etag, self._temp_file.name)
+        else:
+            os.remove(self._temp_file.name)
+
+    def __iter__(self):
+        return iter(lambda: self.read(S3_MULTIPART_PART_SIZE), b"")
+
+    def __enter__(self) -> "_CachingReader":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class S3ObjectCache:
+    """
+    This class is an on-disk read-through cache of S3 objects keyed by bucket, key and ETag.
+    A cached object is revalidated with a conditional GET on every read, If-None-Match answers 304
+    without a body when it is unchanged, and a changed object starts downloading in the same request,
+    as the first of the parallel ranged GETs of an S3RangeReader, and replaces the cached one.
+    Objects are written to a temporary file and renamed into place, readers that still hold the
+    previous file keep it. Files are evicted least recently used first once the cache is larger
+    than max_bytes.
+    """
+
+    def __init__(self, s3_client, cache_dir: str = S3_CACHE_DIR, max_bytes: int = S3_CACHE_MAX_BYTES,
+                 part_size: int = S3_MULTIPART_PART_SIZE, max_concurrency: int = S3_TRANSFER_MAX_CONCURRENCY):
+        self.s3_client = s3_client
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _get_key_dir(self, bucket_name: str, key: str) -> str:
+        key_dir = os.path.join(self.cache_dir, hashlib.sha256(f"{bucket_name}/{key}".encode()).hexdigest())
+        os.makedirs(key_dir, exist_ok=True)
+        return key_dir
+
+    @staticmethod
+    def _find_entry(key_dir: str) -> Optional[str]:
+        etags = [name for name in os.listdir(key_dir) if not name.startswith(".")]
+        return etags[0] if etags else None
+
+    def _fetch(self, bucket_name: str, key: str) -> Tuple[str, Optional[str], Optional[S3RangeReader]]:
+        """
+        Conditional GET of the object, returns (key_dir, cached file path, None) when the cached file
+        is fresh and (key_dir, None, reader) streaming the object otherwise
+        """
+        key_dir = self._get_key_dir(bucket_name, key)
+        etag = self._find_entry(key_dir)
+        get_kwargs = {} if etag is None else {"IfNoneMatch": f'"{etag}"'}
+        try:
+            reader = S3RangeReader.open(self.s3_client, bucket_name, key, part_size=self.part_size,
+                                        max_concurrency=self.max_concurrency, **get_kwargs)
+        except ClientError as e:
+            if etag is not None and e.response["Error"]["Code"] in ("304", "NotModified"):
+                path = os.path.join(key_dir, etag)
+                os.utime(path)
+                logging.info(f"Read {key} of {bucket_name} bucket from the local S3 cache")
+                return key_dir, path, None
+            raise
+        return key_dir, None, reader
+
+    def commit(self, key_dir: str, etag: str, temp_path: str) -> str:
+        """
+        Move a completely downloaded temporary file into the cache as the current version of its key
+        """
+        path = os.path.join(key_dir, etag)
+        os.replace(temp_path, path)
+        for name in os.listdir(key_dir):
+            if name != etag and not name.startswith("."):
+                os.remove(os.path.join(key_dir, name))
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """
+        Remove least recently used files until the cache fits in max_bytes, keep is never removed
+        """
+        with self._lock:
+            entries = []
+            for key_entry in os.scandir(self.cache_dir):
+                if key_entry.is_dir():
+                    entries += [(entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                                for entry in os.scandir(key_entry.path) if not entry.name.startswith(".")]
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path != keep:
+                    os.remove(path)
+                    total -= size
+
+    @staticmethod
+    def _get_etag(reader: S3RangeReader) -> str:
+        return reader.etag.strip('"').replace("/", "_")
+
+    def get_path(self, bucket_name: str, key: str) -> str:
+        """
+        Method Name :   get_path
+        Description :   This method returns a local file with the current content of the object, downloaded
+                        only when the cached copy is missing or stale
+
+        Output      :   Path of the cached file
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            key_dir, path, reader = self._fetch(bucket_name, key)
+            if path is None:
+                with _CachingReader(reader, self, key_dir, self._get_etag(reader)) as caching_reader:
+                    while caching_reader.read(self.part_size):
+                        pass
+                path = os.path.join(key_dir, self._get_etag(reader))
+            return path
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def open(self, bucket_name: str, key: str) -> BinaryIO:
+        """
+        Method Name :   open
+        Description :   This method opens the object for reading, from the cached file when it is fresh,
+                        otherwise streaming from S3 while the object is copied into the cache
+
+        Output      :   Readable binary file object
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            key_dir, path, reader = self._fetch(bucket_name, key)
+            if path is not None:
+                return open(path, "rb")
+            return _CachingReader(reader, self, key_dir, self._get_etag(reader))
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
 
 class SimpleStorageService:
+    # HEAD results of exact keys shared by every instance, (bucket, key) -> (expiry, metadata or None)
+    _metadata_cache: Dict[Tuple[str, str], Tuple[float, Optional[dict]]] = {}
+    _metadata_lock = threading.Lock()
 
-    def __init__(self):
+    def __init__(self, part_size: int = S3_MULTIPART_PART_SIZE, max_concurrency: int = S3_TRANSFER_MAX_CONCURRENCY):
+        """
+        :param part_size: size of the ranged GETs and multipart upload parts
+        :param max_concurrency: ranged GETs or upload parts in flight per transfer
+        """
         s3_client = S3Client()
         self.s3_resource = s3_client.s3_resource
         self.s3_client = s3_client.s3_client
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+        self.transfer_config = TransferConfig(multipart_threshold=part_size, multipart_chunksize=part_size,
+                                              max_concurrency=max_concurrency)
+        self.cache = S3ObjectCache(self.s3_client, part_size=part_size, max_concurrency=max_concurrency) \
+            if S3_CACHE_ENABLED else None
+
+    def get_object_metadata(self, bucket_name: str, key: str,
+                            max_age: float = S3_METADATA_CACHE_TTL_SECONDS) -> Optional[dict]:
+        """
+        Method Name :   get_object_metadata
+        Description :   This method HEADs the exact key, answers younger than max_age seconds, missing
+                        keys included, are served from the process wide metadata cache
+
+        Output      :   HEAD response of the object, None when the key does not exist
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            now = time.monotonic()
+            cached = SimpleStorageService._metadata_cache.get((bucket_name, key))
+            if cached is not None and cached[0] > now:
+                return cached[1]
+            try:
+                metadata = self.s3_client.head_object(Bucket=bucket_name, Key=key)
+            except ClientError as e:
+                if e.response["Error"]["Code"] not in ("404", "NoSuchKey", "NotFound"):
+                    raise
+                metadata = None
+            with SimpleStorageService._metadata_lock:
+                SimpleStorageService._metadata_cache[(bucket_name, key)] = (now + max_age, metadata)
+            return metadata
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @classmethod
+    def invalidate_metadata(cls, bucket_name: str, key: str) -> None:
+        """
+        Drop the cached HEAD result of a key this process has just written
+        """
+        with cls._metadata_lock:
+            cls._metadata_cache.pop((bucket_name, key), None)
+
+    def prefix_available(self, bucket_name: str, prefix: str) -> bool:
+        """
+        Whether any key starts with prefix, a single LIST request for at most one key
+        """
+        try:
+            return self.s3_client.list_objects_v2(Bucket=bucket_name, Prefix=prefix, MaxKeys=1)["KeyCount"] > 0
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def iter_objects(self, bucket_name: str, prefix: str) -> Iterator[object]:
+        """
+        Object summaries of the keys under prefix, listed page by page as they are consumed
+        """
+        try:
+            yield from self.get_bucket(bucket_name).objects.filter(Prefix=prefix)
+        except Exception as e:
+            raise CustomException(e, sys) from e
 
     def s3_key_path_available(self,bucket_name,s3_key)->bool:
+        """
+        Whether s3_key exists as an object, checked with a cached HEAD, or as a folder holding objects
+        """
         try:
-            bucket = self.get_bucket(bucket_name)
-            file_objects = [file_object for file_object in bucket.objects.filter(Prefix=s3_key)]
-            if len(file_objects) > 0:
+            if self.get_object_metadata(bucket_name, s3_key) is not None:
                 return True
-            else:
-                return False
+            return self.prefix_available(bucket_name, s3_key.rstrip("/") + "/")
         except Exception as e:
             raise CustomException(e,sys)
         
         
 
-    @staticmethod
-    def read_object(object_name: str, decode: bool = True, make_readable: bool = False) -> Union[StringIO, str]:
+    def read_object(self, object_name: object, decode: bool = True, make_readable: bool = False) -> Union[TextIO, str, bytes]:
         """
         Method Name :   read_object
-        Description :   This method reads the object_name object with kwargs
+        Description :   This method reads the object_name S3 object with parallel ranged GETs, through the
+                        local S3 cache when it is enabled. With make_readable the object is streamed as text
+                        instead of read into memory
 
-        Output      :   The column name is renamed
+        Output      :   Text stream with make_readable, otherwise the whole content as str, or bytes without decode
         On Failure  :   Write an exception log and then raise an exception
 
         Version     :   1.2
@@ -46,14 +482,14 @@ class SimpleStorageService:
         logging.info("Entered the read_object method of S3Operations class")
 
         try:
-            func = (
-                lambda: object_name.get()["Body"].read().decode()
-                if decode is True
-                else object_name.get()["Body"].read()
-            )
-            conv_func = lambda: StringIO(func()) if make_readable is True else func()
+            body = self.open_object(object_name.key, object_name.bucket_name)
+            if make_readable is True:
+                logging.info("Exited the read_object method of S3Operations class")
+                return codecs.getreader("utf-8")(body)
+            with body:
+                content = body.read()
             logging.info("Exited the read_object method of S3Operations class")
-            return conv_func()
+            return content.decode() if decode is True else content
 
         except Exception as e:
             raise CustomException(e, sys) from e
@@ -81,7 +517,8 @@ class SimpleStorageService:
     def get_file_object( self, filename: str, bucket_name: str) -> Union[List[object], object]:
         """
         Method Name :   get_file_object
-        Description :   This method gets the file object from bucket_name bucket based on filename
+        Description :   This method gets the file object from bucket_name bucket based on filename, an
+                        exact key is found with a cached HEAD and only other filenames are listed as prefix
 
         Output      :   list of objects or object is returned based on filename
         On Failure  :   Write an exception log and then raise an exception
@@ -92,9 +529,11 @@ class SimpleStorageService:
         logging.info("Entered the get_file_object method of S3Operations class")
 
         try:
-            bucket = self.get_bucket(bucket_name)
+            if self.get_object_metadata(bucket_name, filename) is not None:
+                logging.info("Exited the get_file_object method of S3Operations class")
+                return self.s3_resource.Object(bucket_name, filename)
 
-            file_objects = [file_object for file_object in bucket.objects.filter(Prefix=filename)]
+            file_objects = list(self.iter_objects(bucket_name, filename))
 
             func = lambda x: x[0] if len(x) == 1 else x
 
@@ -126,9 +565,11 @@ class SimpleStorageService:
                 else model_dir + "/" + model_name
             )
             model_file = func()
-            file_object = self.get_file_object(model_file, bucket_name)
-            model_obj = self.read_object(file_object, decode=False)
-            model = pickle.loads(model_obj)
+            if self.cache is not None:
+                model = load_object(self.cache.get_path(bucket_name, model_file))
+            else:
+                with self.open_object(model_file, bucket_name) as model_file_object:
+                    model = loads_object(model_file_object.read())
             logging.info("Exited the load_model method of S3Operations class")
             return model
 
@@ -178,8 +619,9 @@ class SimpleStorageService:
             )
 
             self.s3_resource.meta.client.upload_file(
-                from_filename, bucket_name, to_filename
+                from_filename, bucket_name, to_filename, Config=self.transfer_config
             )
+            self.invalidate_metadata(bucket_name, to_filename)
 
             logging.info(
                 f"Uploaded {from_filename} file to {to_filename} file in {bucket_name} bucket"
@@ -198,10 +640,11 @@ class SimpleStorageService:
         except Exception as e:
             raise CustomException(e, sys) from e
 
-    def upload_df_as_csv(self,data_frame: DataFrame,local_filename: str, bucket_filename: str,bucket_name: str,) -> None:
+    def upload_df_as_csv(self,data_frame: DataFrame, bucket_filename: str,bucket_name: str,) -> None:
         """
         Method Name :   upload_df_as_csv
-        Description :   This method uploads the dataframe to bucket_filename csv file in bucket_name bucket
+        Description :   This method uploads the dataframe to bucket_filename csv file in bucket_name bucket,
+                        streamed through a parallel multipart upload without a local file
 
         Output      :   Folder is created in s3 bucket
         On Failure  :   Write an exception log and then raise an exception
@@ -212,15 +655,69 @@ class SimpleStorageService:
         logging.info("Entered the upload_df_as_csv method of S3Operations class")
 
         try:
-            data_frame.to_csv(local_filename, index=None, header=True)
-
-            self.upload_file(local_filename, bucket_filename, bucket_name)
+            with self.open_multipart_writer(bucket_filename, bucket_name) as writer:
+                data_frame.to_csv(writer, index=None, header=True)
 
             logging.info("Exited the upload_df_as_csv method of S3Operations class")
 
         except Exception as e:
             raise CustomException(e, sys) from e
 
+    def open_multipart_writer(self, bucket_filename: str, bucket_name: str,
+                              part_size: Optional[int] = None) -> S3MultipartWriter:
+        """
+        Method Name :   open_multipart_writer
+        Description :   This method starts a multipart upload to bucket_filename in bucket_name bucket
+
+        Output      :   Writable file object, the object appears in the bucket once it is closed
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            return S3MultipartWriter(self.s3_client, bucket_name, bucket_filename,
+                                     part_size=self.part_size if part_size is None else part_size,
+                                     max_concurrency=self.max_concurrency,
+                                     on_complete=lambda: self.invalidate_metadata(bucket_name, bucket_filename))
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def open_object(self, filename: str, bucket_name: str) -> BinaryIO:
+        """
+        Method Name :   open_object
+        Description :   This method opens the filename object of bucket_name bucket for reading, streamed with
+                        parallel ranged GETs, through the local S3 cache when it is enabled
+
+        Output      :   Readable binary file object
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            if self.cache is not None:
+                return self.cache.open(bucket_name, filename)
+            return S3RangeReader.open(self.s3_client, bucket_name, filename, part_size=self.part_size,
+                                      max_concurrency=self.max_concurrency)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def read_csv_chunks(self, filename: str, bucket_name: str, chunksize: int) -> Iterator[DataFrame]:
+        """
+        Method Name :   read_csv_chunks
+        Description :   This method parses the filename csv of bucket_name bucket while it streams from S3,
+                        holding at most chunksize rows in memory
+
+        Output      :   Generator of dataframes of at most chunksize rows
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        logging.info("Entered the read_csv_chunks method of S3Operations class")
+
+        try:
+            body = self.open_object(filename, bucket_name)
+            try:
+                yield from read_csv(body, na_values="na", chunksize=chunksize)
+            finally:
+                body.close()
+            logging.info("Exited the read_csv_chunks method of S3Operations class")
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
     def get_df_from_object(self, object_: object) -> DataFrame:
         """
         Method Name :   get_df_from_object
@@ -235,8 +732,8 @@ class SimpleStorageService:
         logging.info("Entered the get_df_from_object method of S3Operations class")
 
         try:
-            content = self.read_object(object_, make_readable=True)
-            df = read_csv(content, na_values="na")
+            with self.read_object(object_, make_readable=True) as content:
+                df = read_csv(content, na_values="na")
             logging.info("Exited the get_df_from_object method of S3Operations class")
             return df
         except Exception as e:
@@ -256,8 +753,8 @@ class SimpleStorageService:
         logging.info("Entered the read_csv method of S3Operations class")
 
         try:
-            csv_obj = self.get_file_object(filename, bucket_name)
-            df = self.get_df_from_object(csv_obj)
+            with self.open_object(filename, bucket_name) as csv_file:
+                df = read_csv(csv_file, na_values="na")
             logging.info("Exited the read_csv method of S3Operations class")
             return df
         except Exception as e:
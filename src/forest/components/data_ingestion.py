@@ -7,56 +7,185 @@ from src.forest.entity.artifact_entity import *
 from src.forest.constants import *
 from src.forest.utils.main_utils import *
 from src.forest.data_access.forest_data import ForestData
-from sklearn.model_selection import train_test_split
+from src.forest.entity.artifact_cache import ArtifactCache
+from bson import ObjectId
+from typing import List, Optional
+from sklearn.model_selection import StratifiedShuffleSplit
+import hashlib
+import numpy as np
 from src.forest.constants.database import *
 
 class DataIngestion:
-    def __init__(self, data_ingestion_config : DataIngestionConfig = DataIngestionConfig()):
+    def __init__(self, data_ingestion_config : DataIngestionConfig = DataIngestionConfig(),
+                 artifact_cache: Optional[ArtifactCache] = None):
         try:
             self.data_ingestion_config = data_ingestion_config
+            self.artifact_cache = ArtifactCache(write_behind=False) if artifact_cache is None else artifact_cache
+            self._schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
         except Exception as e:
             raise CustomException(e, sys)
 
-    def export_data_into_feature_store(self)->pd.DataFrame:
+    def get_partition_file_path(self, partition_index: int) -> str:
+        """
+        Partition 0 is the full export at feature_store_file_path, later partitions hold incremental syncs
+        """
+        feature_store_file_path = self.data_ingestion_config.feature_store_file_path
+        if partition_index == 0:
+            return feature_store_file_path
+        root, ext = os.path.splitext(feature_store_file_path)
+        return f"{root}_{partition_index:05d}{ext}"
+
+    def read_sync_state(self) -> Optional[dict]:
+        """
+        Returns the sync state stored next to the feature store, None when it is missing or its partitions are gone
+        """
         try:
-            feature_store_file_path = self.data_ingestion_config.feature_store_file_path
-            dir_path = os.path.dirname(feature_store_file_path)
-            os.makedirs(dir_path,exist_ok=True)
-            if os.path.exists(feature_store_file_path):
-                dataframe = pd.read_csv(feature_store_file_path)
+            sync_state_file_path = self.data_ingestion_config.sync_state_file_path
+            if not os.path.exists(sync_state_file_path):
+                return None
+            sync_state = read_yaml_file(file_path=sync_state_file_path)
+            feature_store_dir = self.data_ingestion_config.feature_store_dir
+            for partition in sync_state["partitions"]:
+                if not os.path.exists(os.path.join(feature_store_dir, partition)):
+                    logging.info(f"Feature store partition {partition} is missing, discarding sync state")
+                    return None
+            return sync_state
+        except Exception as e:
+            raise CustomException(e, sys)
 
-            else:
+    def export_partition(self, forest_data: ForestData, partition_file_path: str,
+                         after_id: Optional[ObjectId], until_id: ObjectId) -> int:
+        """
+        Method Name :   export_partition
+        Description :   This method streams the documents in (after_id, until_id] into one feature store partition
+
+        Output      :   Number of rows written, the partition file is only created when it is non empty
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            root, ext = os.path.splitext(partition_file_path)
+            tmp_file_path = f"{root}.tmp{ext}"
+            chunks = forest_data.export_collection_as_chunks(collection_name=COLLECTION_NAME,
+                                                             batch_size=self.data_ingestion_config.export_batch_size,
+                                                             after_id=after_id, until_id=until_id)
+            n_rows = write_dataframe_chunks(tmp_file_path, chunks, schema_config=self._schema_config)
+            if n_rows:
+                os.replace(tmp_file_path, partition_file_path)
+            logging.info(f"Exported {n_rows} rows into feature store partition: {partition_file_path}")
+            return n_rows
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def sync_feature_store(self) -> dict:
+        """
+        Method Name :   sync_feature_store
+        Description :   This method brings the feature store up to date with the mongodb collection.
+                        In incremental mode only documents inserted after the stored high water mark (_id)
+                        are fetched and appended as a new partition; otherwise, or when there is no usable
+                        sync state yet, the whole collection is exported again.
+                        Updates or deletes of already synced documents are not picked up incrementally.
+
+        Output      :   Sync state with the high water mark and the list of partitions
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            os.makedirs(self.data_ingestion_config.feature_store_dir, exist_ok=True)
+            forest_data = ForestData()
+            high_water_mark = forest_data.get_high_water_mark(collection_name=COLLECTION_NAME)
+            if high_water_mark is None:
+                raise Exception(f"No documents found in collection: {COLLECTION_NAME}")
+
+            sync_state = None
+            if self.data_ingestion_config.sync_mode == "incremental":
+                sync_state = self.read_sync_state()
+
+            if sync_state is None:
                 logging.info(f"Exporting data from mongodb")
-                forest_data = ForestData()
-                dataframe = forest_data.export_collection_as_dataframe(collection_name=COLLECTION_NAME)
-                logging.info(f"Shape of dataframe: {dataframe.shape}")
-                
-                logging.info(f"Saving exported data into feature store file path: {feature_store_file_path}")
-                dataframe.to_csv(feature_store_file_path, index=False, header=True)
-            
+                partition_file_path = self.get_partition_file_path(0)
+                self.export_partition(forest_data, partition_file_path, after_id=None, until_id=high_water_mark)
+                sync_state = {"high_water_mark": str(high_water_mark),
+                              "partitions": [os.path.basename(partition_file_path)]}
+
+            elif high_water_mark > ObjectId(sync_state["high_water_mark"]):
+                logging.info(f"Syncing documents after {sync_state['high_water_mark']} from mongodb")
+                partition_file_path = self.get_partition_file_path(len(sync_state["partitions"]))
+                n_rows = self.export_partition(forest_data, partition_file_path,
+                                               after_id=ObjectId(sync_state["high_water_mark"]),
+                                               until_id=high_water_mark)
+                if n_rows:
+                    sync_state["partitions"].append(os.path.basename(partition_file_path))
+                sync_state["high_water_mark"] = str(high_water_mark)
+
+            else:
+                logging.info("Feature store is up to date with mongodb")
+                return sync_state
+
+            write_yaml_file(file_path=self.data_ingestion_config.sync_state_file_path, content=sync_state, replace=True)
+            return sync_state
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_feature_store_file_paths(self, sync_state: dict) -> List[str]:
+        feature_store_dir = self.data_ingestion_config.feature_store_dir
+        return [os.path.join(feature_store_dir, partition) for partition in sync_state["partitions"]]
+
+    def read_feature_store(self, sync_state: dict, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Reads and concatenates the feature store partitions, only loading the given columns
+        """
+        try:
+            return read_dataset(self.get_feature_store_file_paths(sync_state), columns=columns,
+                                schema_config=self._schema_config)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def export_data_into_feature_store(self, columns: Optional[List[str]] = None)->pd.DataFrame:
+        try:
+            sync_state = self.sync_feature_store()
+            dataframe = self.read_feature_store(sync_state, columns=columns)
+            logging.info(f"Shape of dataframe: {dataframe.shape}")
             return dataframe
 
         except Exception as e:
             raise CustomException(e, sys)
 
-    def split_data_as_train_test(self, dataframe:pd.DataFrame):
+    def get_split_fingerprint(self, sync_state: dict, n_rows: int) -> str:
+        """
+        Identifies the data and the settings a split is computed from, equal fingerprints give equal splits
+        """
+        key = "|".join([sync_state["high_water_mark"], ",".join(sync_state["partitions"]), str(n_rows),
+                        str(self.data_ingestion_config.train_test_split_ratio),
+                        str(self.data_ingestion_config.split_random_state)])
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def split_data_as_train_test(self, target: pd.Series, fingerprint: str) -> None:
         """
         Method Name :   split_data_as_train_test
-        Description :   This method splits the dataframe into train set and test set based on split ratio 
-        
-        Output      :   Folder is created in s3 bucket
+        Description :   This method computes a seeded train/test split stratified on the target column and
+                        saves only the row positions of each set next to the feature store, later stages
+                        slice the stored dataset with them. The split is kept when its fingerprint is unchanged.
+
+        Output      :   Split index file is written to split_index_file_path
         On Failure  :   Write an exception log and then raise an exception
         
         Version     :   1.2
         Revisions   :   moved setup to cloud
         """
         try:
-            train_set, test_set = train_test_split(dataframe, test_size = self.data_ingestion_config.train_test_split_ratio)
-            logging.info("Performed train test split on the dataframe")
-            dir_name = os.path.dirname(self.data_ingestion_config.training_file_path)
-            os.makedirs(dir_name, exist_ok=True)
-            train_set.to_csv(self.data_ingestion_config.training_file_path, index= False, header= True)
-            test_set.to_csv(self.data_ingestion_config.testing_file_path, index= False, header= True)
+            split_index_file_path = self.data_ingestion_config.split_index_file_path
+            if os.path.exists(split_index_file_path) and \
+                    load_split_indices(split_index_file_path)["fingerprint"] == fingerprint:
+                logging.info("Feature store is unchanged, keeping the existing train test split")
+                return
+
+            splitter = StratifiedShuffleSplit(n_splits=1, test_size=self.data_ingestion_config.train_test_split_ratio,
+                                              random_state=self.data_ingestion_config.split_random_state)
+            train_index, test_index = next(splitter.split(np.zeros(len(target)), target))
+            index_dtype = np.int32 if len(target) < np.iinfo(np.int32).max else np.int64
+            save_split_indices(split_index_file_path, np.sort(train_index).astype(index_dtype),
+                               np.sort(test_index).astype(index_dtype), fingerprint)
+            logging.info("Performed stratified train test split on the feature store")
         except Exception as e:
             raise CustomException(e, sys)
 
@@ -65,21 +194,21 @@ class DataIngestion:
         Method Name :   initiate_data_ingestion
         Description :   This method initiates the data ingestion components of training pipeline 
         
-        Output      :   train set and test set are returned as the artifacts of data ingestion components
+        Output      :   feature store partitions and the train test split indices are returned as the artifacts of data ingestion components
         On Failure  :   Write an exception log and then raise an exception
         
         Version     :   1.2
         Revisions   :   moved setup to cloud
         """
         try:
-            dataframe = self.export_data_into_feature_store()
-            _schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
-            dataframe = dataframe.drop(_schema_config['drop_columns'], axis=1)
-            self.split_data_as_train_test(dataframe=dataframe)
+            sync_state = self.sync_feature_store()
+            feature_store_file_paths = self.get_feature_store_file_paths(sync_state)
+            target = read_dataset(feature_store_file_paths, columns=[TARGET_COLUMN])[TARGET_COLUMN]
+            self.split_data_as_train_test(target=target, fingerprint=self.get_split_fingerprint(sync_state, len(target)))
             data_ingestion_artifact = DataIngestionArtifact(
-                trained_file_path=self.data_ingestion_config.training_file_path,
-                test_file_path= self.data_ingestion_config.testing_file_path
+                feature_store_file_paths=feature_store_file_paths,
+                split_index_file_path=self.data_ingestion_config.split_index_file_path
             )
             return data_ingestion_artifact
         except Exception as e:
-            raise CustomException(e, sys)
\ No newline at end of file
+            raise CustomException(e, sys)
@@ -12,12 +12,15 @@ from src.forest.constants import *
 from src.forest.entity.config_entity import *
 from src.forest.entity.artifact_entity import *
 from src.forest.utils.main_utils import save_object, save_numpy_array_data,read_yaml_file
+from src.forest.entity.artifact_cache import ArtifactCache
+from typing import Optional
 
 class DataTransformation:
     def __init__(self, data_ingestion_artifact: DataIngestionArtifact,
-    data_transformation_config : DataTransformationConfig):
+    data_transformation_config : DataTransformationConfig, artifact_cache: Optional[ArtifactCache] = None):
         self.data_ingestion_artifact=data_ingestion_artifact
         self.data_transformation_config =  data_transformation_config
+        self.artifact_cache = ArtifactCache(write_behind=False) if artifact_cache is None else artifact_cache
     
     def get_data_transformer_object(self) -> object:
         """
@@ -54,10 +57,15 @@ class DataTransformation:
         except Exception as e:
             raise CustomException(e, sys) from e
 
-    @staticmethod
-    def read_data(file_path) -> pd.DataFrame:
+    def read_data(self, split: str) -> pd.DataFrame:
+        """
+        Reads only the model input columns and the target column of the train or test rows
+        """
         try:
-            return pd.read_csv(file_path)
+            _schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+            columns = _schema_config['numerical_columns'] + [TARGET_COLUMN]
+            return self.artifact_cache.get_split(self.data_ingestion_artifact, split, columns=columns,
+                                                 schema_config=_schema_config)
         except Exception as e:
             raise CustomException(e, sys)
 
@@ -65,8 +73,8 @@ class DataTransformation:
         try:
             preprocessor = self.get_data_transformer_object()
             
-            train_df = DataTransformation.read_data(file_path=self.data_ingestion_artifact.trained_file_path)
-            test_df = DataTransformation.read_data(file_path= self.data_ingestion_artifact.test_file_path)
+            train_df = self.read_data(split="train")
+            test_df = self.read_data(split="test")
             logging.info("Got train features and test features of Training dataset")
 
             input_feature_train_df = train_df.drop(columns=[TARGET_COLUMN],axis=1)
@@ -103,9 +111,9 @@ class DataTransformation:
             
             test_arr = np.c_[input_feature_test_arr, np.array(target_feature_test_df)]
 
-            save_object(self.data_transformation_config.transformed_object_file_path, preprocessor)
-            save_numpy_array_data(self.data_transformation_config.transformed_train_file_path, array=train_arr)
-            save_numpy_array_data(self.data_transformation_config.transformed_test_file_path, array=test_arr)
+            self.artifact_cache.put(self.data_transformation_config.transformed_object_file_path, preprocessor, save_object)
+            self.artifact_cache.put(self.data_transformation_config.transformed_train_file_path, train_arr, save_numpy_array_data)
+            self.artifact_cache.put(self.data_transformation_config.transformed_test_file_path, test_arr, save_numpy_array_data)
 
             logging.info("Saved the preprocessor object")
 
@@ -7,51 +7,46 @@ from src.forest.entity.config_entity import *
 from src.forest.entity.artifact_entity import *
 from src.forest.constants import *
 from src.forest.utils.main_utils import *
+from src.forest.entity.artifact_cache import ArtifactCache
+from src.forest.entity.schema_validator import SchemaValidator, ValidationReport
+from typing import Optional
 from evidently.model_profile import Profile
 from evidently.model_profile.sections import DataDriftProfileSection
 
 class DataValidation:
     def __init__(self, data_ingestion_artifact = DataIngestionArtifact,
-    data_validation_config = DataValidationConfig):
+    data_validation_config = DataValidationConfig, artifact_cache: Optional[ArtifactCache] = None):
         self.data_ingestion_artifact = data_ingestion_artifact
         self.data_validation_config = data_validation_config
+        self.artifact_cache = ArtifactCache(write_behind=False) if artifact_cache is None else artifact_cache
         self._schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+        self.schema_validator = SchemaValidator.from_schema(self._schema_config)
 
-    @staticmethod
-    def read_data(filepath) ->pd.DataFrame:
-        try:
-            return pd.read_csv(filepath)
-        except Exception as e:
-            raise CustomException(e, sys)
-
-    def validate_number_of_columns(self, dataframe: pd.DataFrame) -> bool:
+    def read_data(self) ->pd.DataFrame:
         """
-        :param dataframe:
-        :return: True if all required columns present
+        Reads the whole ingested dataset, the train and test sets are row slices of it
         """
         try:
-            status = len(dataframe.columns) == len(self._schema_config["columns"])
-            logging.info(f"Is required column present: [{status}]")
-            return status
+            return self.artifact_cache.get_dataframe(self.data_ingestion_artifact.feature_store_file_paths,
+                                                     schema_config=self._schema_config)
         except Exception as e:
             raise CustomException(e, sys)
 
-    def is_numerical_column_exist(self, dataframe: pd.DataFrame) -> bool:
+    def validate_schema(self, dataframe: pd.DataFrame) -> ValidationReport:
         """
-        This function check all the numerical column is present in dataframe or not
-        :param df:
-        :return: True if all column presents else False
+        Method Name :   validate_schema
+        Description :   This method checks presence, dtype, range and null rate of every schema.yaml column
+                        and the one hot groups, and writes the report to the data validation directory
+
+        Output      :   ValidationReport
+        On Failure  :   Write an exception log and then raise an exception
         """
         try:
-            dataframe_columns = dataframe.columns
-            status = True
-            missing_numerical_columns = []
-            for column in self._schema_config["numerical_columns"]:
-                if column not in dataframe_columns:
-                    status = False
-                    missing_numerical_columns.append(column)
-            logging.info(f"Missing numerical column: {missing_numerical_columns}")
-            return status
+            report = self.schema_validator.validate(dataframe)
+            write_yaml_file(file_path=self.data_validation_config.validation_report_file_path,
+                            content=report.to_dict(), replace=True)
+            logging.info(f"Schema validation of {report.n_rows} rows: valid [{report.valid}] errors {report.errors}")
+            return report
         except Exception as e:
             raise CustomException(e, sys) from e
     
@@ -87,29 +82,16 @@ class DataValidation:
     def initiate_data_validation(self):
         logging.info("Entered initiate_data_validation method of Data_Validation class")
         try:
-            validation_error_msg = ''
-            train_df, test_df = (DataValidation.read_data(filepath=self.data_ingestion_artifact.trained_file_path),
-            (DataValidation.read_data(filepath=self.data_ingestion_artifact.test_file_path)))
-
-            status = self.validate_number_of_columns(dataframe=train_df)
-            if not status:
-                validation_error_msg += "Columns are missing in train dataframe"
-
-            status = self.validate_number_of_columns(dataframe=test_df)
-            if not status:
-                validation_error_msg += "Columns are missing in Test dataframe"
-
-            status = self.is_numerical_column_exist(dataframe=train_df)
-            if not status:
-                validation_error_msg += "Columns are missing in train dataframe"
+            dataframe = self.read_data()
 
-            status = self.is_numerical_column_exist(dataframe=test_df)
-            if not status:
-                validation_error_msg += "Columns are missing in Test dataframe"
+            report = self.validate_schema(dataframe=dataframe)
+            validation_error_msg = "; ".join(report.errors)
 
-            validation_status = len(validation_error_msg) == 0
+            validation_status = report.valid
 
             '''if validation_status:
+                train_df = self.artifact_cache.get_split(self.data_ingestion_artifact, "train", schema_config=self._schema_config)
+                test_df = self.artifact_cache.get_split(self.data_ingestion_artifact, "test", schema_config=self._schema_config)
                 drift_status = self.detect_dataset_drift(train_df, test_df)
                 if drift_status:
                     logging.info("Data Drift Detected")
@@ -119,7 +101,8 @@ class DataValidation:
             data_validation_artifact = DataValidationArtifact(
                 validation_status=validation_status,
                 message= validation_error_msg,
-                drift_report_file_path=self.data_validation_config.drift_report_file_path
+                drift_report_file_path=self.data_validation_config.drift_report_file_path,
+                validation_report_file_path=self.data_validation_config.validation_report_file_path
             )
             
             logging.info(f"Data validation artifact: {data_validation_artifact}")
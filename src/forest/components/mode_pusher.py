@@ -5,14 +5,19 @@ from src.forest.logger import logging
 from src.forest.entity.artifact_entity import ModelPusherArtifact, ModelTrainerArtifact
 from src.forest.entity.config_entity import ModelPusherConfig
 from src.forest.entity.s3_estimator import ForestEstimator
+from src.forest.entity.artifact_cache import ArtifactCache
+from src.forest.entity.model_cache import ModelCache
+from src.forest.utils.main_utils import load_object
+from typing import Optional
 
 
 class ModelPusher:
     def __init__(self, model_trainer_artifact: ModelTrainerArtifact,
-                 model_pusher_config: ModelPusherConfig):
+                 model_pusher_config: ModelPusherConfig, artifact_cache: Optional[ArtifactCache] = None):
         self.s3 = SimpleStorageService()
         self.model_trainer_artifact = model_trainer_artifact
         self.model_pusher_config = model_pusher_config
+        self.artifact_cache = ArtifactCache(write_behind=False) if artifact_cache is None else artifact_cache
         self.sensor_estimator = ForestEstimator(bucket_name=model_pusher_config.bucket_name,
                                 model_path=model_pusher_config.s3_model_key_path)
 
@@ -20,8 +25,13 @@ class ModelPusher:
         logging.info("Entered initiate_model_pusher method of ModelTrainer class")
 
         try:
+            self.artifact_cache.wait(self.model_trainer_artifact.trained_model_file_path)
             logging.info("Uploading artifacts folder to s3 bucket")
-            self.sensor_estimator.save_model(from_file=self.model_trainer_artifact.trained_model_file_path)                 
+            version = self.sensor_estimator.save_model(from_file=self.model_trainer_artifact.trained_model_file_path)
+            trained_model_file_path = self.model_trainer_artifact.trained_model_file_path
+            ModelCache.publish(self.sensor_estimator.model_uri,
+                               model=self.artifact_cache.get(trained_model_file_path, load_object),
+                               version=version)
             model_pusher_artifact = ModelPusherArtifact(bucket_name=self.model_pusher_config.bucket_name,
                                                         s3_model_path=self.model_pusher_config.s3_model_key_path)
             logging.info("Uploaded artifacts folder to s3 bucket")
@@ -8,6 +8,7 @@ from src.forest.exception import CustomException
 from src.forest.constants import *
 from src.forest.logger import logging
 from src.forest.entity.s3_estimator import ForestEstimator
+from src.forest.entity.artifact_cache import ArtifactCache
 from dataclasses import dataclass
 from typing import Optional
 
@@ -21,11 +22,12 @@ class EvaluateModelResponse:
 class ModelEvaluation:
 
     def __init__(self, model_eval_config: ModelEvaluationConfig, data_ingestion_artifact: DataIngestionArtifact,
-                 model_trainer_artifact: ModelTrainerArtifact):
+                 model_trainer_artifact: ModelTrainerArtifact, artifact_cache: Optional[ArtifactCache] = None):
         try:
             self.model_eval_config = model_eval_config
             self.data_ingestion_artifact = data_ingestion_artifact
             self.model_trainer_artifact = model_trainer_artifact
+            self.artifact_cache = ArtifactCache(write_behind=False) if artifact_cache is None else artifact_cache
         except Exception as e:
             raise CustomException(e, sys) from e
 
@@ -44,9 +46,12 @@ class ModelEvaluation:
 
     def evaluate_model(self) -> EvaluateModelResponse:
         try:
-            test_df = pd.read_csv(self.data_ingestion_artifact.test_file_path)
+            _schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+            test_df = self.artifact_cache.get_split(self.data_ingestion_artifact, "test",
+                                                    columns=_schema_config['numerical_columns'] + [TARGET_COLUMN],
+                                                    schema_config=_schema_config)
             x, y = test_df.drop(TARGET_COLUMN, axis=1), test_df[TARGET_COLUMN]
-            trained_model = load_object(file_path=self.model_trainer_artifact.trained_model_file_path)
+            trained_model = self.artifact_cache.get(self.model_trainer_artifact.trained_model_file_path, load_object)
             y_hat_trained_model = trained_model.predict(x)
             trained_model_f1_score = f1_score(y, y_hat_trained_model,average='micro')
 
@@ -0,0 +1,201 @@
+import os
+import sys
+import math
+import importlib
+import inspect
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.model_selection import ParameterGrid, train_test_split
+from src.forest.exception import CustomException
+from src.forest.logger import logging
+from src.forest.utils.main_utils import read_yaml_file
+
+SEARCH_KEY = "grid_search"
+MODEL_SELECTION_KEY = "model_selection"
+RESOURCES_KEY = "resources"
+SCREENING_KEY = "screening"
+
+
+def _fit_and_score_candidate(model: object, params: dict, X: np.ndarray, y: np.ndarray, sample_index: np.ndarray,
+                             validation_index: np.ndarray) -> float:
+    candidate = clone(model).set_params(**params)
+    candidate.fit(X[sample_index], y[sample_index])
+    return candidate.score(X[validation_index], y[validation_index])
+
+
+@dataclass
+class SearchedModel:
+    model_serial_number: str
+    model: object
+    best_model: object
+    best_parameters: dict
+    best_score: float
+
+
+class ModelSearch:
+    """
+    This class runs the hyperparameter search described in model.yaml.
+    The grid_search section picks the sklearn search class: GridSearchCV, RandomizedSearchCV,
+    HalvingGridSearchCV or HalvingRandomSearchCV, with its params. Fits of every fold and candidate
+    are spread over a loky process pool sized by resources.n_jobs, the core budget of the trainer.
+    """
+
+    def __init__(self, model_config_path: str):
+        try:
+            self.config: dict = read_yaml_file(file_path=model_config_path)
+            self.search_config: dict = self.config[SEARCH_KEY]
+            self.models_config: dict = dict(self.config[MODEL_SELECTION_KEY])
+            self.n_jobs: int = ModelSearch.get_core_budget(self.config.get(RESOURCES_KEY) or {})
+            self.screening_config: dict = self.config.get(SCREENING_KEY) or {}
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @staticmethod
+    def get_core_budget(resources_config: dict) -> int:
+        """
+        Number of cores the search may use, -1 or a missing n_jobs means every core of the machine
+        """
+        cpu_count = os.cpu_count() or 1
+        n_jobs = resources_config.get("n_jobs", -1)
+        if n_jobs is None or n_jobs < 1:
+            return cpu_count
+        return min(int(n_jobs), cpu_count)
+
+    @staticmethod
+    def class_for_name(module_name: str, class_name: str) -> type:
+        if class_name.startswith("Halving"):
+            importlib.import_module("sklearn.experimental.enable_halving_search_cv")
+        return getattr(importlib.import_module(module_name), class_name)
+
+    def get_initialized_model(self, model_config: dict) -> object:
+        """
+        Builds the estimator of one model_selection entry, estimators with their own n_jobs get a
+        single core because the search already runs one fit per core
+        """
+        model = ModelSearch.class_for_name(model_config["module"], model_config["class"])()
+        model.set_params(**(model_config.get("params") or {}))
+        if "n_jobs" in model.get_params():
+            model.set_params(n_jobs=1)
+        return model
+
+    def get_search_object(self, model: object, param_grid: object) -> object:
+        search_class = ModelSearch.class_for_name(self.search_config["module"], self.search_config["class"])
+        grid_key = "param_distributions" if "param_distributions" in inspect.signature(search_class).parameters \
+            else "param_grid"
+        search_params = dict(self.search_config.get("params") or {})
+        search_params["n_jobs"] = self.n_jobs
+        return search_class(estimator=model, **{grid_key: param_grid}, **search_params)
+
+    def search_model(self, model_serial_number: str, X: np.ndarray, y: np.ndarray,
+                     param_grid: Optional[object] = None) -> SearchedModel:
+        """
+        Method Name :   search_model
+        Description :   This method searches the hyperparameters of one model_selection entry,
+                        param_grid overrides the search_param_grid of model.yaml
+
+        Output      :   SearchedModel with the refitted best estimator
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            model_config = self.models_config[model_serial_number]
+            model = self.get_initialized_model(model_config)
+            if param_grid is None:
+                param_grid = model_config["search_param_grid"]
+            search = self.get_search_object(model, param_grid)
+            logging.info(f"Running {type(search).__name__} of {type(model).__name__} on {self.n_jobs} cores")
+            search.fit(X, y)
+            logging.info(f"{model_serial_number} best params: {search.best_params_} score: {search.best_score_}")
+            return SearchedModel(model_serial_number=model_serial_number, model=model,
+                                 best_model=search.best_estimator_, best_parameters=search.best_params_,
+                                 best_score=search.best_score_)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_screening_candidates(self) -> Tuple[List[Tuple[str, dict]], Dict[str, object]]:
+        """
+        Splits the search space into single grid points that can be screened and whole grids that cannot,
+        grids holding distributions instead of lists of values are passed to the full search unscreened
+        """
+        candidates, unscreened = [], {}
+        for model_serial_number, model_config in self.models_config.items():
+            param_grid = model_config["search_param_grid"]
+            grids = param_grid if isinstance(param_grid, list) else [param_grid]
+            if all(isinstance(values, list) for grid in grids for values in grid.values()):
+                candidates.extend((model_serial_number, params) for params in ParameterGrid(param_grid))
+            else:
+                unscreened[model_serial_number] = param_grid
+        return candidates, unscreened
+
+    def screen_candidates(self, X: np.ndarray, y: np.ndarray) -> Dict[str, object]:
+        """
+        Method Name :   screen_candidates
+        Description :   This method fits every model and grid point of model.yaml on growing stratified
+                        subsamples of the training data and scores them on one held out stratified sample.
+                        After each round the best 1/factor of the candidates, plus any within tolerance of
+                        the best score, move on to factor times more rows; the rest are dropped.
+
+        Output      :   Param grid of the surviving grid points for each model serial number
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            candidates, survivors = self.get_screening_candidates()
+            # stratified splits need every class twice, and a held out sample of at most a fifth of the rows
+            # holding every class, smaller datasets are not screened
+            _, class_counts = np.unique(y, return_counts=True)
+            validation_samples = min(self.screening_config.get("validation_samples", 20000), len(y) // 5)
+            if not self.screening_config.get("enabled", False) or len(candidates) <= 1 or \
+                    class_counts.min() < 2 or validation_samples < len(class_counts):
+                for model_serial_number, params in candidates:
+                    survivors.setdefault(model_serial_number, []).append({key: [value] for key, value in params.items()})
+                return survivors
+
+            random_state = self.screening_config.get("random_state", 42)
+            factor = self.screening_config.get("factor", 3)
+            tolerance = self.screening_config.get("tolerance", 0.0)
+            n_samples = self.screening_config.get("min_samples", 10000)
+            max_samples = self.screening_config.get("max_samples", len(y) // 4)
+            sample_pool, validation_index = train_test_split(
+                np.arange(len(y)), test_size=validation_samples, stratify=y, random_state=random_state)
+
+            while len(candidates) > 1 and n_samples <= min(max_samples, len(sample_pool) - len(class_counts)):
+                sample_index, _ = train_test_split(sample_pool, train_size=n_samples, stratify=y[sample_pool],
+                                                   random_state=random_state)
+                models = {model_serial_number: self.get_initialized_model(self.models_config[model_serial_number])
+                          for model_serial_number in {model_serial_number for model_serial_number, _ in candidates}}
+                scores = Parallel(n_jobs=self.n_jobs)(
+                    delayed(_fit_and_score_candidate)(models[model_serial_number], params, X, y, sample_index,
+                                                      validation_index)
+                    for model_serial_number, params in candidates)
+
+                best_score = max(scores)
+                n_keep = max(1, math.ceil(len(candidates) / factor))
+                ranked = sorted(zip(scores, range(len(candidates))), key=lambda item: -item[0])
+                keep = {position for rank, (score, position) in enumerate(ranked)
+                        if rank < n_keep or score >= best_score - tolerance}
+                logging.info(f"Screened {len(candidates)} candidates on {n_samples} rows, best score {best_score}, "
+                             f"{len(keep)} survive")
+                candidates = [candidate for position, candidate in enumerate(candidates) if position in keep]
+                n_samples *= factor
+
+            for model_serial_number, params in candidates:
+                survivors.setdefault(model_serial_number, []).append({key: [value] for key, value in params.items()})
+            return survivors
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_best_model(self, X: np.ndarray, y: np.ndarray, param_grids: Optional[Dict[str, object]] = None) -> SearchedModel:
+        """
+        Searches every model_selection entry on the full data and returns the best one,
+        param_grids restricts the search to some models and grid points, e.g. the survivors of screen_candidates
+        """
+        try:
+            if param_grids is None:
+                param_grids = {model_serial_number: None for model_serial_number in self.models_config}
+            searched_models = [self.search_model(model_serial_number, X, y, param_grid=param_grid)
+                               for model_serial_number, param_grid in param_grids.items()]
+            return max(searched_models, key=lambda searched_model: searched_model.best_score)
+        except Exception as e:
+            raise CustomException(e, sys) from e
@@ -1,38 +1,42 @@
 import sys
+from functools import partial
 from src.forest.constants import *
 from src.forest.exception import CustomException
 from src.forest.logger import logging
 from src.forest.entity.config_entity import *
 from src.forest.entity.artifact_entity import *
-from neuro_mf  import ModelFactory
+from src.forest.components.model_search import ModelSearch
 from src.forest.entity.estimator import ForestModel
 from src.forest.utils.main_utils import *
-from typing import List, Tuple
+from src.forest.utils.model_serialization import save_model_object
+from src.forest.entity.artifact_cache import ArtifactCache
+from typing import List, Optional, Tuple
 from sklearn.metrics import f1_score, precision_score, recall_score
 
 class ModelTrainer:
     def __init__(self, data_transformation_artifact: DataTransformationArtifact,
-                 model_trainer_config: ModelTrainerConfig):
+                 model_trainer_config: ModelTrainerConfig, artifact_cache: Optional[ArtifactCache] = None):
         self.data_transformation_artifact = data_transformation_artifact
         self.model_trainer_config = model_trainer_config
+        self.artifact_cache = ArtifactCache(write_behind=False) if artifact_cache is None else artifact_cache
 
     def get_model_object_and_report(self, train: np.array, test: np.array) -> Tuple[object, object]:
         """
         Method Name :   get_model_object_and_report
-        Description :   This function uses neuro_mf to get the best model object and report of the best model
+        Description :   This function uses ModelSearch to get the best model object and report of the best model
         
         Output      :   Returns metric artifact object and best model object
         On Failure  :   Write an exception log and then raise an exception
         """
         try:
-            logging.info("Using neuro_mf to get best model object and report")
-            model_factory = ModelFactory(model_config_path=self.model_trainer_config.model_config_file_path)
+            logging.info("Using ModelSearch to get best model object and report")
+            model_search = ModelSearch(model_config_path=self.model_trainer_config.model_config_file_path)
             
             x_train, y_train, x_test, y_test = train[:, :-1], train[:, -1], test[:, :-1], test[:, -1]
 
-            best_model_detail = model_factory.get_best_model(
-                X=x_train,y=y_train,base_accuracy=self.model_trainer_config.expected_accuracy
-            )
+            param_grids = model_search.screen_candidates(X=x_train, y=y_train)
+            logging.info(f"Candidates surviving the screening: {param_grids}")
+            best_model_detail = model_search.get_best_model(X=x_train, y=y_train, param_grids=param_grids)
             model_obj = best_model_detail.best_model
 
             y_pred = model_obj.predict(x_test)
@@ -50,8 +54,8 @@ class ModelTrainer:
     def initiate_model_trainer(self) -> ModelTrainerArtifact:
         logging.info("Entered initiate_model_trainer method of ModelTrainer class")
         try:
-            train_arr = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_train_file_path)
-            test_arr = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_test_file_path)
+            train_arr = self.artifact_cache.get(self.data_transformation_artifact.transformed_train_file_path, load_numpy_array_data)
+            test_arr = self.artifact_cache.get(self.data_transformation_artifact.transformed_test_file_path, load_numpy_array_data)
             
             best_model_detail ,metric_artifact = self.get_model_object_and_report(train=train_arr, test=test_arr)
             
@@ -59,13 +63,15 @@ class ModelTrainer:
                 logging.info("No best model found with score more than base score")
                 raise Exception("No best model found with score more than base score")
 
-            preprocessing_obj = load_object(file_path=self.data_transformation_artifact.transformed_object_file_path)
+            preprocessing_obj = self.artifact_cache.get(self.data_transformation_artifact.transformed_object_file_path, load_object)
 
-            forest_model = ForestModel(preprocessing_object=preprocessing_obj,trained_model_object=best_model_detail.best_model)
+            forest_model = ForestModel(preprocessing_object=preprocessing_obj,trained_model_object=best_model_detail.best_model,
+                                       inference_engine=self.model_trainer_config.inference_engine)
             
             logging.info("Created Forest model object with preprocessor and model")
             logging.info("Created best model file path.")
-            save_object(self.model_trainer_config.trained_model_file_path, forest_model)
+            self.artifact_cache.put(self.model_trainer_config.trained_model_file_path, forest_model,
+                                    partial(save_model_object, compress=self.model_trainer_config.model_compression))
 
             model_trainer_artifact = ModelTrainerArtifact(
                 trained_model_file_path=self.model_trainer_config.trained_model_file_path,
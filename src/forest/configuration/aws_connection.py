@@ -1,6 +1,8 @@
 import boto3
 import os
+from botocore.config import Config
 from dotenv import load_dotenv
+from src.forest.constants.s3_bucket import S3_MAX_POOL_CONNECTIONS
 load_dotenv()
 
 class S3Client:
@@ -17,16 +19,20 @@ class S3Client:
                 raise Exception("Environment variable:  is not not set.")
             if __secret_access_key is None:
                 raise Exception("Environment variable:  is not set.")
+            # parallel ranged reads and multipart uploads share the connection pool of the client
+            config = Config(max_pool_connections=S3_MAX_POOL_CONNECTIONS)
         
             S3Client.s3_resource = boto3.resource('s3',
                                             aws_access_key_id=__access_key_id,
                                             aws_secret_access_key=__secret_access_key,
-                                            region_name=region_name
+                                            region_name=region_name,
+                                            config=config
                                             )
             S3Client.s3_client = boto3.client('s3',
                                         aws_access_key_id=__access_key_id,
                                         aws_secret_access_key=__secret_access_key,
-                                        region_name=region_name
+                                        region_name=region_name,
+                                        config=config
                                         )
         self.s3_resource = S3Client.s3_resource
         self.s3_client = S3Client.s3_client
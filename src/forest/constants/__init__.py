@@ -3,25 +3,33 @@ from from_root import from_root
 
 # common file name
 TARGET_COLUMN = "Cover_Type"
-FILE_NAME: str = "covtype.csv"
-TRAIN_FILE_NAME: str = "train.csv"
-TEST_FILE_NAME: str = "test.csv"
+FILE_NAME: str = "covtype.parquet"
+TRAIN_FILE_NAME: str = "train.parquet"
+TEST_FILE_NAME: str = "test.parquet"
 PREPROCSSING_OBJECT_FILE_NAME = "preprocessing.pkl"
 SCHEMA_FILE_PATH = os.path.join("config", "schema.yaml")
 
 # Data Ingestion related constants
 
 ARTIFACTS_DIR = os.path.join(from_root(), "artifacts")
+STAGE_FINGERPRINT_DIR_NAME: str = "stage_fingerprints"
 DATA_INGESTION_ARTIFACTS_DIR = "DataIngestion"
 DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store"
-DATA_INGESTION_INGESTED_DIR: str = "ingested"
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO: float = 0.2
+DATA_INGESTION_SPLIT_RANDOM_STATE: int = 42
+DATA_INGESTION_SPLIT_INDEX_FILE_NAME: str = "split_indices.npz"
+DATA_INGESTION_EXPORT_BATCH_SIZE: int = 10000
+DATA_INGESTION_SYNC_MODE: str = "incremental"
+DATA_INGESTION_SYNC_STATE_FILE_NAME: str = "sync_state.yaml"
 
 #Data Validation realted contant start with DATA_VALIDATION VAR NAME
 
 DATA_VALIDATION_DIR_NAME: str = "data_validation"
 DATA_VALIDATION_DRIFT_REPORT_DIR: str = "drift_report"
 DATA_VALIDATION_DRIFT_REPORT_FILE_NAME: str = "report.yaml"
+DATA_VALIDATION_REPORT_FILE_NAME: str = "validation_report.yaml"
+# row numbers kept per failed check of the SchemaValidator, enough to report every row of an online request
+SCHEMA_VALIDATOR_MAX_ERROR_ROWS: int = 1000
 
 #Data Transformation ralated constant start with DATA_TRANSFORMATION VAR NAME
 
@@ -36,6 +44,8 @@ MODEL_TRAINER_DIR_NAME: str = "model_trainer"
 MODEL_TRAINER_TRAINED_MODEL_DIR: str = "trained_model"
 MODEL_TRAINER_TRAINED_MODEL_NAME: str = "model.pkl"
 MODEL_TRAINER_EXPECTED_SCORE: float = 0.6
+MODEL_TRAINER_MODEL_COMPRESSION: bool = False
+MODEL_TRAINER_INFERENCE_ENGINE: str = "compiled"
 MODEL_FILE_NAME = "model.pkl"
 MODEL_TRAINER_MODEL_CONFIG_FILE_PATH: str = os.path.join("config", "model.yaml")
 
@@ -45,4 +55,34 @@ MODEL_TRAINER_MODEL_CONFIG_FILE_PATH: str = os.path.join("config", "model.yaml")
 MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE: float = 0.02
 MODEL_PUSHER_BUCKET_NAME = "forest-model1"
 MODEL_PUSHER_S3_KEY = "model-registry"
+MODEL_REGISTRY_MANIFEST_FILE_NAME: str = "manifest.json"
+MODEL_REGISTRY_VERSIONS_DIR: str = "versions"
+MODEL_REGISTRY_HISTORY_SIZE: int = 20
 
+
+
+#MODEL CACHE related constant start with MODEL_CACHE var name
+
+MODEL_CACHE_CHECK_INTERVAL_SECONDS: float = 10.0
+MODEL_CACHE_WATCH_INTERVAL_SECONDS: float = 30.0
+
+
+#JOB MANAGER related constant start with JOB_MANAGER var name
+
+JOB_MANAGER_MAX_WORKERS: int = 2
+JOB_MANAGER_HISTORY_SIZE: int = 100
+
+
+#COMPILED FOREST related constant start with COMPILED_FOREST var name
+
+COMPILED_FOREST_BLOCK_ROWS: int = 4096
+# the vectorized walk wins on the per call overhead of small batches, sklearn's compiled tree loops
+# win on large ones, ForestModel sends batches above this size to sklearn
+COMPILED_FOREST_MAX_ROWS: int = 256
+
+
+#MICRO BATCH related constant start with MICRO_BATCH var name
+
+# coalesced batches stay small enough for the compiled forest engine
+MICRO_BATCH_MAX_ROWS: int = COMPILED_FOREST_MAX_ROWS
+MICRO_BATCH_MAX_WAIT_MS: float = 5.0
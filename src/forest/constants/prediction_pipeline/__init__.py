@@ -3,4 +3,12 @@ from src.forest.constants.s3_bucket import PREDICTION_BUCKET_NAME,TRAINING_BUCKE
 PREDICTION_DATA_BUCKET = PREDICTION_BUCKET_NAME
 PREDICTION_INPUT_FILE_NAME = "forest_pred_data.csv"
 PREDICTION_OUTPUT_FILE_NAME = "forest_predictions.csv"
-MODEL_BUCKET_NAME = TRAINING_BUCKET_NAME
\ No newline at end of file
+PREDICTION_OUTPUT_DIR = "predictions"
+PREDICTION_OUTPUT_FORMAT = "csv"
+MODEL_BUCKET_NAME = TRAINING_BUCKET_NAME
+PREDICTION_CHUNK_SIZE = 50000
+PREDICTION_N_JOBS = -1
+# workers start from a clean server process, the app forking from a threaded process could hand them
+# locks held by its other threads, "fork" is an opt in for single threaded command line runs
+PREDICTION_MP_START_METHOD = "forkserver"
+PREDICTION_WARM_UP_ROWS = 512
@@ -1,2 +1,12 @@
+import os
+from from_root import from_root
+
 TRAINING_BUCKET_NAME="forest-model1"
-PREDICTION_BUCKET_NAME="forest-pred-data1"
\ No newline at end of file
+PREDICTION_BUCKET_NAME="forest-pred-data1"
+S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024
+S3_TRANSFER_MAX_CONCURRENCY: int = 8
+S3_MAX_POOL_CONNECTIONS: int = 32
+S3_CACHE_ENABLED: bool = True
+S3_CACHE_DIR: str = os.path.join(from_root(), "s3_cache")
+S3_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+S3_METADATA_CACHE_TTL_SECONDS: float = 5.0
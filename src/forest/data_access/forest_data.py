@@ -1,31 +1,137 @@
 import sys
 import numpy as np
 import pandas as pd
+from bson import ObjectId
+from itertools import islice
+from src.forest.constants import SCHEMA_FILE_PATH, DATA_INGESTION_EXPORT_BATCH_SIZE
 from src.forest.constants.database import *
 from src.forest.exception import CustomException
 from src.forest.configuration.mongo_db_connection import MongoDBClient
-from typing import Optional
+from src.forest.utils.main_utils import read_yaml_file, get_schema_dtypes
+from typing import Dict, Iterator, List, Optional
 
 class ForestData:
     def __init__(self):
         try:
             self.mongo_client = MongoDBClient(database_name=DATABASE_NAME)
+            self._schema_dtypes = get_schema_dtypes(read_yaml_file(file_path=SCHEMA_FILE_PATH))
         except Exception as e:
             raise CustomException(e, sys)
 
-    def export_collection_as_dataframe(self, collection_name : str, database_name : Optional[str]=None)->pd.DataFrame:
+    def get_collection(self, collection_name: str, database_name: Optional[str] = None):
+        if database_name is None:
+            return self.mongo_client.database[collection_name]
+        return self.mongo_client.client[database_name][collection_name]
+
+    def get_high_water_mark(self, collection_name: str, database_name: Optional[str] = None) -> Optional[ObjectId]:
+        """
+        Method Name :   get_high_water_mark
+        Description :   This method returns the largest _id currently in the collection, None if it is empty
+
+        Output      :   ObjectId of the last inserted document
+        On Failure  :   Write an exception log and then raise an exception
+        """
         try:
-            if database_name is None:
-                collection = self.mongo_client.database[collection_name]
-            else:
-                collection = self.mongo_client[database_name][collection_name]
+            collection = self.get_collection(collection_name, database_name)
+            document = collection.find_one({}, projection={"_id": True}, sort=[("_id", -1)])
+            return None if document is None else document["_id"]
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _buffer_dtype(self, column: str) -> Optional[type]:
+        """
+        NumPy dtype used for the column buffer of a schema column, None for columns unknown to the schema
+        """
+        dtype = self._schema_dtypes.get(column)
+        if dtype is None:
+            return None
+        if dtype in ("int", "category"):
+            return np.int64
+        return np.dtype(dtype)
 
-            df = pd.DataFrame(list(collection.find()))
+    @staticmethod
+    def _column_buffer(values: list, dtype: Optional[type]) -> np.ndarray:
+        """
+        Builds a typed column buffer from the raw values of one chunk.
+        Chunks holding 'na' or missing values fall back to float64 so they can carry NaN,
+        values that do not fit the compact schema dtype keep the int64 buffer.
+        """
+        buffer = np.asarray(values)
+        if buffer.dtype.kind in "OUS":
+            series = pd.Series(values, dtype=object).replace({"na": np.nan})
+            buffer = series.to_numpy() if dtype is None else pd.to_numeric(series).to_numpy()
+        if dtype is not None and buffer.dtype.kind in "iub":
+            info = np.iinfo(dtype)
+            if buffer.size == 0 or (info.min <= buffer.min() and buffer.max() <= info.max):
+                buffer = buffer.astype(dtype, copy=False)
+        return buffer
 
-            if "_id" in list(df.columns):
-                df = df.drop(columns=['_id'], axis=1)
-            df.replace({'na':np.nan}, inplace=True)
-            return df
+    def export_collection_as_column_chunks(self, collection_name: str, database_name: Optional[str] = None,
+                                           batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE,
+                                           after_id: Optional[ObjectId] = None,
+                                           until_id: Optional[ObjectId] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Method Name :   export_collection_as_column_chunks
+        Description :   This method streams the collection with _id projected away on the server and
+                        yields one dict of typed numpy column buffers per batch_size documents.
+                        after_id (exclusive) and until_id (inclusive) restrict the export to an _id range.
+
+        Output      :   Generator of column name -> np.ndarray dicts
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            collection = self.get_collection(collection_name, database_name)
+            id_range = {}
+            if after_id is not None:
+                id_range["$gt"] = after_id
+            if until_id is not None:
+                id_range["$lte"] = until_id
+            query = {"_id": id_range} if id_range else {}
+            cursor = collection.find(query, projection={"_id": False}, batch_size=batch_size, sort=[("_id", 1)])
+            columns: Optional[List[str]] = None
+            while True:
+                documents = list(islice(cursor, batch_size))
+                if not documents:
+                    break
+                if columns is None:
+                    columns = list(documents[0].keys())
+                yield {
+                    column: self._column_buffer([document.get(column, np.nan) for document in documents],
+                                                self._buffer_dtype(column))
+                    for column in columns
+                }
 
         except Exception as e:
-            raise CustomException(e, sys)
\ No newline at end of file
+            raise CustomException(e, sys)
+
+    def export_collection_as_chunks(self, collection_name: str, database_name: Optional[str] = None,
+                                    batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE,
+                                    after_id: Optional[ObjectId] = None,
+                                    until_id: Optional[ObjectId] = None) -> Iterator[pd.DataFrame]:
+        """
+        Method Name :   export_collection_as_chunks
+        Description :   This method yields the collection as dataframe chunks of at most batch_size rows
+
+        Output      :   Generator of dataframes
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            for column_chunk in self.export_collection_as_column_chunks(collection_name, database_name, batch_size,
+                                                                        after_id, until_id):
+                yield pd.DataFrame(column_chunk, copy=False)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def export_collection_as_dataframe(self, collection_name : str, database_name : Optional[str]=None,
+                                       batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE)->pd.DataFrame:
+        try:
+            column_chunks: Dict[str, List[np.ndarray]] = {}
+            for column_chunk in self.export_collection_as_column_chunks(collection_name, database_name, batch_size):
+                for column, buffer in column_chunk.items():
+                    column_chunks.setdefault(column, []).append(buffer)
+
+            return pd.DataFrame({column: np.concatenate(buffers) for column, buffers in column_chunks.items()},
+                                copy=False)
+
+        except Exception as e:
+            raise CustomException(e, sys)
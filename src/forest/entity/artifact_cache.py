@@ -0,0 +1,132 @@
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, FrozenSet, List, Optional, Union
+from pandas import DataFrame
+from src.forest.entity.artifact_entity import DataIngestionArtifact
+from src.forest.exception import CustomException
+from src.forest.logger import logging
+from src.forest.utils.main_utils import read_dataset, load_split_indices
+
+
+class ArtifactCache:
+    """
+    This class keeps the artifacts of one training run in memory so each stage hands its
+    outputs to the next one instead of the next stage parsing them back from disk.
+    Artifacts are keyed by the file path they are persisted to, the file itself is written
+    behind on a single background thread so writes land on disk in the order they were put.
+    """
+
+    def __init__(self, write_behind: bool = True):
+        """
+        :param write_behind: when False every put writes its file before returning
+        """
+        self._objects: Dict[str, object] = {}
+        self._frame_columns: Dict[str, Optional[FrozenSet[str]]] = {}
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifact-writer") if write_behind else None
+
+    def put(self, file_path: str, obj: object, writer: Callable[[str, object], None]) -> object:
+        """
+        Cache obj under file_path and persist it with writer(file_path, obj)
+        The object must not be mutated afterwards, it may still be in the middle of being written
+        """
+        try:
+            with self._lock:
+                self._objects[file_path] = obj
+                if self._executor is not None:
+                    self._pending[file_path] = self._executor.submit(writer, file_path, obj)
+            if self._executor is None:
+                writer(file_path, obj)
+            return obj
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get(self, file_path: str, loader: Callable[[str], object]) -> object:
+        """
+        Return the artifact cached under file_path, loading it with loader(file_path) on a miss
+        """
+        try:
+            with self._lock:
+                if file_path in self._objects:
+                    return self._objects[file_path]
+            logging.info(f"Artifact cache miss, loading {file_path}")
+            obj = loader(file_path)
+            with self._lock:
+                self._objects.setdefault(file_path, obj)
+            return obj
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_dataframe(self, file_path: Union[str, List[str]], columns: Optional[List[str]] = None,
+                      schema_config: Optional[dict] = None) -> DataFrame:
+        """
+        Return the dataframe stored at file_path, or the concatenation of a list of partition files,
+        projected on columns. A cached frame serves every projection of the columns it was read with,
+        on a miss only the requested columns are read and cached.
+        """
+        try:
+            file_paths = [file_path] if isinstance(file_path, str) else list(file_path)
+            key = "|".join(file_paths)
+            with self._lock:
+                dataframe = self._objects.get(key)
+                cached_columns = self._frame_columns.get(key)
+            if dataframe is not None and (cached_columns is None or
+                                          (columns is not None and cached_columns.issuperset(columns))):
+                return dataframe if columns is None else dataframe[columns]
+
+            logging.info(f"Artifact cache miss, reading {key}")
+            dataframe = read_dataset(file_paths, columns=columns, schema_config=schema_config)
+            with self._lock:
+                self._objects[key] = dataframe
+                self._frame_columns[key] = None if columns is None else frozenset(columns)
+            return dataframe
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_split(self, data_ingestion_artifact: DataIngestionArtifact, split: str,
+                  columns: Optional[List[str]] = None, schema_config: Optional[dict] = None) -> DataFrame:
+        """
+        Return the train or test rows of the ingested dataset, sliced from the one cached feature store
+        frame with the stored split indices
+        :param split: "train" or "test"
+        """
+        try:
+            dataframe = self.get_dataframe(data_ingestion_artifact.feature_store_file_paths, columns=columns,
+                                           schema_config=schema_config)
+            split_indices = self.get(data_ingestion_artifact.split_index_file_path, load_split_indices)
+            return dataframe.iloc[split_indices[split]]
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def wait(self, file_path: str) -> None:
+        """
+        Block until the file of the artifact cached under file_path is written
+        """
+        try:
+            with self._lock:
+                future = self._pending.get(file_path)
+            if future is not None:
+                future.result()
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def flush(self) -> None:
+        """
+        Block until every pending write is done, raising the first write error
+        """
+        try:
+            with self._lock:
+                futures = list(self._pending.values())
+            for future in futures:
+                future.result()
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
@@ -1,16 +1,18 @@
 from dataclasses import dataclass
+from typing import List
 
 
 @dataclass
 class DataIngestionArtifact:
-    trained_file_path:str 
-    test_file_path:str 
+    feature_store_file_paths:List[str]
+    split_index_file_path:str
 
 @dataclass
 class DataValidationArtifact:
     validation_status: bool
     message : str
     drift_report_file_path: str
+    validation_report_file_path: str
 
 @dataclass
 class DataTransformationArtifact:
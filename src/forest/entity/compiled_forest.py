@@ -0,0 +1,216 @@
+import sys
+import numpy as np
+import sklearn
+from typing import List, Optional, Tuple
+from pandas import DataFrame
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from src.forest.constants import COMPILED_FOREST_BLOCK_ROWS
+from src.forest.exception import CustomException
+
+# sklearn < 1.4 stores class counts in tree_.value and normalizes them in predict_proba,
+# later versions store the fractions themselves
+_NORMALIZES_LEAF_VALUES = tuple(int(part) for part in sklearn.__version__.split(".")[:2]) < (1, 4)
+
+
+def _to_ordered_keys(values: np.ndarray) -> np.ndarray:
+    """
+    Maps float64 values to int64 keys with the same order, consecutive floats get consecutive keys
+    """
+    bits = values.view(np.int64)
+    return bits ^ ((bits >> 63) & np.int64(0x7FFFFFFFFFFFFFFF))
+
+
+def _from_ordered_keys(keys: np.ndarray) -> np.ndarray:
+    return (keys ^ ((keys >> 63) & np.int64(0x7FFFFFFFFFFFFFFF))).view(np.float64)
+
+
+def fold_thresholds(thresholds: np.ndarray, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """
+    Method Name :   fold_thresholds
+    Description :   This method moves split thresholds of standardized features back to raw feature values.
+                    A sklearn tree sends x left when float32((x - mean) / scale) <= threshold, this predicate is
+                    monotone in x, so it holds exactly for x <= c where c is the largest float64 satisfying it.
+                    c is found for every node at once by bisecting over the ordered float64 bit patterns.
+
+    Output      :   float64 raw thresholds c, x <= c reproduces the sklearn split bit for bit
+    On Failure  :   Write an exception log and then raise an exception
+    """
+    try:
+        def goes_left(keys: np.ndarray) -> np.ndarray:
+            standardized = (_from_ordered_keys(keys) - mean) / scale
+            return standardized.astype(np.float32).astype(np.float64) <= thresholds
+
+        low = np.full(thresholds.shape, _to_ordered_keys(np.array([-np.inf]))[0], dtype=np.int64)
+        high = np.full(thresholds.shape, _to_ordered_keys(np.array([np.inf]))[0], dtype=np.int64)
+        with np.errstate(over="ignore", invalid="ignore"):
+            for _ in range(65):
+                middle = (low >> 1) + (high >> 1) + (low & high & 1)
+                left = goes_left(middle)
+                low = np.where(left, middle, low)
+                high = np.where(left, high, middle)
+        return _from_ordered_keys(low)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+class CompiledForest:
+    """
+    This class is an inference engine for the ForestModel built by the training pipeline: a
+    ColumnTransformer of SimpleImputer and StandardScaler in front of a random forest classifier.
+    The nodes of all trees are concatenated into flat arrays, the scaler is folded into the split
+    thresholds so raw feature values are compared directly, and leaves point to themselves so a
+    batch walks every tree at once for max_depth vectorized steps. Leaf probabilities are summed in
+    tree order and divided by the number of trees like sklearn does, so predictions are bit identical.
+    """
+
+    def __init__(self, feature_columns: List[str], fill_values: np.ndarray, children: np.ndarray,
+                 feature: np.ndarray, threshold: np.ndarray, leaf_proba: np.ndarray, roots: np.ndarray,
+                 max_depth: int, classes: np.ndarray):
+        self.feature_columns = feature_columns
+        self.fill_values = fill_values
+        self.children = children
+        self.feature = feature
+        self.threshold = threshold
+        self.leaf_proba = leaf_proba
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.is_leaf = children[0::2] == np.arange(len(threshold))
+
+    @staticmethod
+    def get_preprocessing_steps(preprocessing_object: object) -> Tuple[List[str], SimpleImputer, Optional[StandardScaler]]:
+        """
+        Unpacks the preprocessor into its input columns, imputer and scaler, raises ValueError for any
+        preprocessor the engine can not reproduce exactly
+        """
+        if not isinstance(preprocessing_object, ColumnTransformer) or len(preprocessing_object.transformers_) != 1:
+            raise ValueError("Expected a ColumnTransformer with a single transformer")
+        _, pipeline, columns = preprocessing_object.transformers_[0]
+        if not isinstance(pipeline, Pipeline):
+            raise ValueError("Expected a Pipeline in the ColumnTransformer")
+        steps = [step for _, step in pipeline.steps]
+        if not steps or not isinstance(steps[0], SimpleImputer) or len(steps) > 2 or \
+                (len(steps) == 2 and not isinstance(steps[1], StandardScaler)):
+            raise ValueError("Expected a SimpleImputer optionally followed by a StandardScaler")
+        imputer = steps[0]
+        if not (isinstance(imputer.missing_values, float) and np.isnan(imputer.missing_values)) \
+                or np.isnan(imputer.statistics_).any() or getattr(imputer, "add_indicator", False):
+            raise ValueError("Imputer has to fill NaN of every column")
+        return list(columns), imputer, steps[1] if len(steps) == 2 else None
+
+    @classmethod
+    def from_forest_model(cls, preprocessing_object: object, trained_model_object: object) -> "CompiledForest":
+        """
+        Method Name :   from_forest_model
+        Description :   This method compiles the preprocessor and the forest classifier of a ForestModel
+
+        Output      :   CompiledForest
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            columns, imputer, scaler = CompiledForest.get_preprocessing_steps(preprocessing_object)
+            if not isinstance(trained_model_object, (RandomForestClassifier, ExtraTreesClassifier)) \
+                    or trained_model_object.n_outputs_ != 1:
+                raise ValueError("Expected a single output forest classifier")
+            n_features = len(columns)
+            mean = scaler.mean_ if scaler is not None and scaler.with_mean else np.zeros(n_features)
+            scale = scaler.scale_ if scaler is not None and scaler.with_std else np.ones(n_features)
+            n_classes = trained_model_object.n_classes_
+
+            trees = [estimator.tree_ for estimator in trained_model_object.estimators_]
+            offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+            children, features, thresholds, leaf_probas = [], [], [], []
+            for offset, tree in zip(offsets, trees):
+                nodes = np.arange(tree.node_count)
+                is_leaf = tree.children_left == -1
+                left = np.where(is_leaf, nodes, tree.children_left) + offset
+                right = np.where(is_leaf, nodes, tree.children_right) + offset
+                children.append(np.stack([left, right], axis=1))
+                feature = np.where(is_leaf, 0, tree.feature)
+                features.append(feature)
+                raw_threshold = np.full(tree.node_count, np.inf)
+                raw_threshold[~is_leaf] = fold_thresholds(tree.threshold[~is_leaf], mean[feature[~is_leaf]],
+                                                          scale[feature[~is_leaf]])
+                thresholds.append(raw_threshold)
+                proba = tree.value[:, 0, :n_classes].astype(np.float64)
+                if _NORMALIZES_LEAF_VALUES:
+                    normalizer = proba.sum(axis=1)[:, np.newaxis]
+                    normalizer[normalizer == 0.0] = 1.0
+                    proba /= normalizer
+                leaf_probas.append(proba)
+
+            index_dtype = np.int32 if offsets[-1] < np.iinfo(np.int32).max // 2 else np.int64
+            return cls(feature_columns=columns,
+                       fill_values=imputer.statistics_.astype(np.float64),
+                       children=np.concatenate(children).astype(index_dtype).ravel(),
+                       feature=np.concatenate(features).astype(index_dtype),
+                       threshold=np.concatenate(thresholds),
+                       leaf_proba=np.ascontiguousarray(np.concatenate(leaf_probas)),
+                       roots=offsets[:-1].astype(index_dtype),
+                       max_depth=max(tree.max_depth for tree in trees),
+                       classes=trained_model_object.classes_)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_feature_values(self, dataframe: DataFrame) -> Optional[np.ndarray]:
+        """
+        Raw input columns as float64, None when sklearn would keep them as float32 and round differently
+        """
+        values = dataframe[self.feature_columns].to_numpy()
+        if values.dtype.kind == "f" and values.dtype.itemsize < 8:
+            return None
+        return values.astype(np.float64)
+
+    def apply(self, values: np.ndarray) -> np.ndarray:
+        """
+        Leaf index of every tree (rows) for every row (columns) of float64 feature values, NaN is imputed.
+        All (tree, row) walks advance one level per vectorized step, walks that reached a leaf are
+        dropped from the active set so later steps only touch the deeper paths.
+        """
+        values = np.where(np.isnan(values), self.fill_values, values)
+        n_rows, n_features = values.shape
+        n_trees = len(self.roots)
+        flat_values = values.ravel()
+        leaves = np.repeat(self.roots, n_rows)
+        value_offsets = np.tile(np.arange(n_rows, dtype=np.int64) * n_features, n_trees)
+        active = np.arange(n_trees * n_rows)
+        nodes = leaves
+        for _ in range(self.max_depth):
+            goes_right = flat_values[value_offsets + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[2 * nodes + goes_right]
+            at_leaf = self.is_leaf[nodes]
+            if at_leaf.any():
+                leaves[active[at_leaf]] = nodes[at_leaf]
+                walking = ~at_leaf
+                active, nodes, value_offsets = active[walking], nodes[walking], value_offsets[walking]
+                if not len(active):
+                    break
+        leaves[active] = nodes
+        return leaves.reshape(n_trees, n_rows)
+
+    def predict_proba_values(self, values: np.ndarray) -> np.ndarray:
+        """
+        Method Name :   predict_proba_values
+        Description :   This method scores float64 feature values in blocks of COMPILED_FOREST_BLOCK_ROWS rows
+
+        Output      :   Class probabilities of every row
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            probabilities = np.zeros((len(values), len(self.classes_)), dtype=np.float64)
+            for start in range(0, len(values), COMPILED_FOREST_BLOCK_ROWS):
+                leaves = self.apply(values[start:start + COMPILED_FOREST_BLOCK_ROWS])
+                block = probabilities[start:start + COMPILED_FOREST_BLOCK_ROWS]
+                for tree_leaves in leaves:
+                    block += self.leaf_proba[tree_leaves]
+            probabilities /= len(self.roots)
+            return probabilities
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def predict_values(self, values: np.ndarray) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba_values(values), axis=1), axis=0)
@@ -8,10 +8,14 @@ from src.forest.constants import prediction_pipeline
 class DataIngestionConfig:
     def __init__(self):
         self.data_ingestion_dir: str = os.path.join(from_root(), ARTIFACTS_DIR, DATA_INGESTION_ARTIFACTS_DIR)
-        self.feature_store_file_path: str = os.path.join(self.data_ingestion_dir, DATA_INGESTION_FEATURE_STORE_DIR, FILE_NAME)
-        self.training_file_path: str = os.path.join(self.data_ingestion_dir, DATA_INGESTION_INGESTED_DIR, TRAIN_FILE_NAME)
-        self.testing_file_path: str = os.path.join(self.data_ingestion_dir, DATA_INGESTION_INGESTED_DIR, TEST_FILE_NAME)
+        self.feature_store_dir: str = os.path.join(self.data_ingestion_dir, DATA_INGESTION_FEATURE_STORE_DIR)
+        self.feature_store_file_path: str = os.path.join(self.feature_store_dir, FILE_NAME)
+        self.sync_state_file_path: str = os.path.join(self.feature_store_dir, DATA_INGESTION_SYNC_STATE_FILE_NAME)
+        self.split_index_file_path: str = os.path.join(self.feature_store_dir, DATA_INGESTION_SPLIT_INDEX_FILE_NAME)
         self.train_test_split_ratio: float = DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO
+        self.split_random_state: int = DATA_INGESTION_SPLIT_RANDOM_STATE
+        self.export_batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE
+        self.sync_mode: str = DATA_INGESTION_SYNC_MODE
     
 
 @dataclass
@@ -20,6 +24,7 @@ class DataValidationConfig:
         self.data_validation_dir: str = os.path.join(from_root(), ARTIFACTS_DIR, DATA_VALIDATION_DIR_NAME)
         self.drift_report_file_path: str = os.path.join(self.data_validation_dir, DATA_VALIDATION_DRIFT_REPORT_DIR,
                                                DATA_VALIDATION_DRIFT_REPORT_FILE_NAME)
+        self.validation_report_file_path: str = os.path.join(self.data_validation_dir, DATA_VALIDATION_REPORT_FILE_NAME)
 
 
 @dataclass
@@ -27,9 +32,9 @@ class DataTransformationConfig:
     def __init__(self):
         self.data_transformation_dir: str = os.path.join(from_root(),ARTIFACTS_DIR, DATA_TRANSFORMATION_DIR_NAME)
         self.transformed_train_file_path: str = os.path.join(self.data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
-                                                        TRAIN_FILE_NAME.replace("csv", "npy"))
+                                                        os.path.splitext(TRAIN_FILE_NAME)[0] + ".npy")
         self.transformed_test_file_path: str = os.path.join(self.data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
-                                                    TEST_FILE_NAME.replace("csv", "npy"))
+                                                    os.path.splitext(TEST_FILE_NAME)[0] + ".npy")
         self.transformed_object_file_path: str = os.path.join(self.data_transformation_dir,
                                                         DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR,
                                                         PREPROCSSING_OBJECT_FILE_NAME)
@@ -40,6 +45,8 @@ class ModelTrainerConfig:
         self.model_trainer_dir: str = os.path.join(from_root(),ARTIFACTS_DIR, MODEL_TRAINER_DIR_NAME)
         self.trained_model_file_path: str = os.path.join(self.model_trainer_dir, MODEL_TRAINER_TRAINED_MODEL_DIR, MODEL_FILE_NAME)
         self.expected_accuracy: float = MODEL_TRAINER_EXPECTED_SCORE
+        self.model_compression: bool = MODEL_TRAINER_MODEL_COMPRESSION
+        self.inference_engine: str = MODEL_TRAINER_INFERENCE_ENGINE
         self.model_config_file_path: str = MODEL_TRAINER_MODEL_CONFIG_FILE_PATH
 
 @dataclass
@@ -61,5 +68,12 @@ class PredictionPipelineConfig:
     model_bucket_name: str = prediction_pipeline.MODEL_BUCKET_NAME
     model_file_path: str = os.path.join(MODEL_PUSHER_S3_KEY, MODEL_FILE_NAME) #/model-registry/model.pkl
     output_file_name:str = prediction_pipeline.PREDICTION_OUTPUT_FILE_NAME
+    output_dir: str = prediction_pipeline.PREDICTION_OUTPUT_DIR
+    output_format: str = prediction_pipeline.PREDICTION_OUTPUT_FORMAT
+    chunk_size: int = prediction_pipeline.PREDICTION_CHUNK_SIZE
+    n_jobs: int = prediction_pipeline.PREDICTION_N_JOBS
+    mp_start_method: str = prediction_pipeline.PREDICTION_MP_START_METHOD
+    warm_up_rows: int = prediction_pipeline.PREDICTION_WARM_UP_ROWS
+    watch_interval: float = MODEL_CACHE_WATCH_INTERVAL_SECONDS
     model_trainer_dir: str = os.path.join(from_root(),ARTIFACTS_DIR, MODEL_TRAINER_DIR_NAME)
     trained_model_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_TRAINED_MODEL_DIR, MODEL_FILE_NAME)
@@ -1,22 +1,116 @@
 import sys
+import threading
+import numpy as np
 from pandas import DataFrame
+from sklearn.ensemble import BaseEnsemble
 from sklearn.pipeline import Pipeline
+from sklearn.tree import BaseDecisionTree
+from typing import Callable, Optional
+from src.forest.constants import COMPILED_FOREST_MAX_ROWS
+from src.forest.entity.compiled_forest import CompiledForest
+from src.forest.entity.fused_preprocessor import FusedPreprocessor
 from src.forest.exception import CustomException
 from src.forest.logger import logging
 
+INFERENCE_ENGINE_SKLEARN = "sklearn"
+INFERENCE_ENGINE_COMPILED = "compiled"
+
+_COMPILE_LOCK = threading.Lock()
+
+
+def is_tree_model(model: object) -> bool:
+    """
+    True for a fitted sklearn decision tree or an ensemble made only of trees, e.g. a random forest
+    """
+    if isinstance(model, BaseDecisionTree):
+        return True
+    estimators = getattr(model, "estimators_", None)
+    if not isinstance(model, BaseEnsemble) or estimators is None or not len(estimators):
+        return False
+    return all(isinstance(estimator, BaseDecisionTree) for estimator in np.ravel(np.asarray(estimators, dtype=object)))
+
 
 class ForestModel:
-    def __init__(self, preprocessing_object: Pipeline, trained_model_object: object):
+    # models pickled before inference engines existed run on sklearn
+    inference_engine: str = INFERENCE_ENGINE_SKLEARN
+
+    def __init__(self, preprocessing_object: Pipeline, trained_model_object: object,
+                 inference_engine: str = INFERENCE_ENGINE_SKLEARN):
+        """
+        :param inference_engine: "sklearn", or "compiled" to predict batches of up to COMPILED_FOREST_MAX_ROWS
+                                 rows with a CompiledForest of the model, built on first use, when the
+                                 model is supported by it
+        """
         self.preprocessing_object = preprocessing_object
         self.trained_model_object = trained_model_object
+        self.inference_engine = inference_engine
+
+    def __getstate__(self) -> dict:
+        # the compiled forest and fused preprocessor are derived from the model, they are rebuilt after
+        # loading instead of stored
+        state = self.__dict__.copy()
+        state.pop("_compiled_forest", None)
+        state.pop("_fused_preprocessor", None)
+        return state
+
+    def _get_derived(self, attribute: str, build: Callable[[], object]) -> Optional[object]:
+        """
+        Builds a derived inference object once and keeps it in attribute, None when the model does not support it
+        """
+        derived = self.__dict__.get(attribute)
+        if derived is None:
+            with _COMPILE_LOCK:
+                derived = self.__dict__.get(attribute)
+                if derived is None:
+                    try:
+                        derived = build()
+                    except Exception as e:
+                        logging.info(f"Model does not support {attribute.strip('_')}, using sklearn: {e}")
+                        derived = False
+                    setattr(self, attribute, derived)
+        return derived or None
+
+    def get_compiled_forest(self) -> Optional[CompiledForest]:
+        """
+        The CompiledForest of the model, None when the engine is sklearn or the model can not be compiled
+        """
+        if self.inference_engine != INFERENCE_ENGINE_COMPILED:
+            return None
+        return self._get_derived("_compiled_forest", lambda: CompiledForest.from_forest_model(
+            self.preprocessing_object, self.trained_model_object))
+
+    def get_fused_preprocessor(self) -> Optional[FusedPreprocessor]:
+        """
+        The FusedPreprocessor of the model, None unless the trained model is a tree or forest. Those cast
+        their input to float32 themselves, other estimators would get a different input from its float32 output
+        """
+        if not is_tree_model(self.trained_model_object):
+            return None
+        return self._get_derived("_fused_preprocessor",
+                                 lambda: FusedPreprocessor.from_preprocessing_object(self.preprocessing_object))
+
+    def transform(self, dataframe: DataFrame) -> np.ndarray:
+        """
+        Model input of the trained model, through the fused preprocessor when it supports the model and the input
+        """
+        fused_preprocessor = self.get_fused_preprocessor()
+        transformed_feature = None if fused_preprocessor is None else fused_preprocessor.transform(dataframe)
+        if transformed_feature is None:
+            transformed_feature = self.preprocessing_object.transform(dataframe)
+        return transformed_feature
 
     def predict(self, dataframe: DataFrame) -> DataFrame:
         logging.info("Entered predict method of SensorTruckModel class")
 
         try:
+            compiled_forest = self.get_compiled_forest() if len(dataframe) <= COMPILED_FOREST_MAX_ROWS else None
+            values = None if compiled_forest is None else compiled_forest.get_feature_values(dataframe)
+            if values is not None:
+                return compiled_forest.predict_values(values)
+
             logging.info("Using the trained model to get predictions")
 
-            transformed_feature = self.preprocessing_object.transform(dataframe)
+            transformed_feature = self.transform(dataframe)
 
             logging.info("Used the trained model to get predictions")
             return self.trained_model_object.predict(transformed_feature)
@@ -24,6 +118,26 @@ class ForestModel:
         except Exception as e:
             raise CustomException(e, sys) from e
 
+    def predict_proba(self, dataframe: DataFrame) -> np.ndarray:
+        """
+        Class probabilities of every row, columns ordered as self.classes_
+        """
+        try:
+            compiled_forest = self.get_compiled_forest() if len(dataframe) <= COMPILED_FOREST_MAX_ROWS else None
+            values = None if compiled_forest is None else compiled_forest.get_feature_values(dataframe)
+            if values is not None:
+                return compiled_forest.predict_proba_values(values)
+
+            transformed_feature = self.transform(dataframe)
+            return self.trained_model_object.predict_proba(transformed_feature)
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @property
+    def classes_(self) -> np.ndarray:
+        return self.trained_model_object.classes_
+
     def __repr__(self):
         return f"{type(self.trained_model_object).__name__}()"
 
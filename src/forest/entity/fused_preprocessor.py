@@ -0,0 +1,101 @@
+import sys
+import threading
+import numpy as np
+from pandas import DataFrame
+from typing import Dict, Optional, Tuple
+from src.forest.entity.compiled_forest import CompiledForest
+from src.forest.exception import CustomException
+
+
+class FusedPreprocessor:
+    """
+    This class replays the fitted ColumnTransformer of SimpleImputer and StandardScaler as one pass over
+    a single buffer: the input columns are copied into it in model order, NaN is replaced by the imputer
+    statistics, the mean is subtracted and the scale divided in place, and the result is cast straight
+    into the float32 array the forest predicts on. Subtraction and division stay separate float64 steps
+    instead of one multiply add so the output is bit identical to the sklearn transform.
+    Where the input columns sit in a dataframe is resolved once per column layout and reused.
+    """
+
+    def __init__(self, feature_columns: list, fill_values: np.ndarray, mean: Optional[np.ndarray],
+                 scale: Optional[np.ndarray]):
+        self.feature_columns = feature_columns
+        self.fill_values = fill_values[:, np.newaxis]
+        self.mean = None if mean is None else mean[:, np.newaxis]
+        self.scale = None if scale is None else scale[:, np.newaxis]
+        self._column_positions: Dict[Tuple[object, ...], np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_column_positions"] = {}
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_preprocessing_object(cls, preprocessing_object: object) -> "FusedPreprocessor":
+        """
+        Method Name :   from_preprocessing_object
+        Description :   This method precomputes the fill values, mean and scale of the fitted preprocessor
+
+        Output      :   FusedPreprocessor
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            columns, imputer, scaler = CompiledForest.get_preprocessing_steps(preprocessing_object)
+            mean = scaler.mean_ if scaler is not None and scaler.with_mean else None
+            scale = scaler.scale_ if scaler is not None and scaler.with_std else None
+            return cls(feature_columns=columns, fill_values=imputer.statistics_.astype(np.float64),
+                       mean=None if mean is None else mean.astype(np.float64),
+                       scale=None if scale is None else scale.astype(np.float64))
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_column_positions(self, dataframe: DataFrame) -> np.ndarray:
+        """
+        Positions of the model input columns in the dataframe, cached per column layout
+        """
+        layout = tuple(dataframe.columns)
+        positions = self._column_positions.get(layout)
+        if positions is None:
+            positions = dataframe.columns.get_indexer(self.feature_columns)
+            if (positions < 0).any():
+                missing = [column for column, position in zip(self.feature_columns, positions) if position < 0]
+                raise KeyError(f"Columns are missing in dataframe: {missing}")
+            with self._lock:
+                self._column_positions[layout] = positions
+        return positions
+
+    def transform(self, dataframe: DataFrame) -> Optional[np.ndarray]:
+        """
+        Method Name :   transform
+        Description :   This method preprocesses the model input columns of dataframe
+
+        Output      :   C contiguous float32 array, None for float32 input columns, which sklearn
+                        standardizes in float32 and so has to transform itself
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            positions = self.get_column_positions(dataframe)
+            buffer = np.empty((len(positions), len(dataframe)), dtype=np.float64)
+            for row, position in enumerate(positions):
+                column = dataframe.iloc[:, position]
+                if column.dtype.kind == "f" and column.dtype.itemsize < 8:
+                    return None
+                buffer[row] = column.to_numpy()
+
+            np.copyto(buffer, self.fill_values, where=np.isnan(buffer))
+            if self.mean is not None:
+                np.subtract(buffer, self.mean, out=buffer)
+            if self.scale is not None:
+                np.divide(buffer, self.scale, out=buffer)
+
+            transformed = np.empty((len(dataframe), len(positions)), dtype=np.float32)
+            np.copyto(transformed, buffer.T, casting="same_kind")
+            return transformed
+        except Exception as e:
+            raise CustomException(e, sys) from e
@@ -0,0 +1,182 @@
+import sys
+import time
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Optional
+from src.forest.constants import MODEL_CACHE_CHECK_INTERVAL_SECONDS, MODEL_CACHE_WATCH_INTERVAL_SECONDS
+from src.forest.exception import CustomException
+from src.forest.logger import logging
+
+
+@dataclass
+class CachedModel:
+    model: object
+    version: Hashable
+    checked_at: float
+
+
+class ModelWatcher:
+    """
+    This class polls the version of one cached model on a daemon thread and, when it changes, loads
+    and prepares the new model off the request path before publishing it to ModelCache. A failed
+    poll or load is logged and the previous model keeps serving until the next poll.
+    """
+
+    def __init__(self, key: str, version_fn: Callable[[], Hashable], loader: Callable[[], object],
+                 prepare: Optional[Callable[[object], None]] = None,
+                 interval: float = MODEL_CACHE_WATCH_INTERVAL_SECONDS):
+        """
+        :param prepare: called with a freshly loaded model before it is published, e.g. to warm it up
+        """
+        self.key = key
+        self.version_fn = version_fn
+        self.loader = loader
+        self.prepare = prepare
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def poll(self) -> bool:
+        """
+        Method Name :   poll
+        Description :   This method checks the version once and swaps in the new model if it changed.
+                        The load lock of the key is held while loading so a request loading the key for
+                        the first time and the watcher never load the same model twice.
+
+        Output      :   True if a new model was published
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            with ModelCache._get_load_lock(self.key):
+                version = self.version_fn()
+                cached = ModelCache._models.get(self.key)
+                if cached is not None and cached.version == version:
+                    cached.checked_at = time.monotonic()
+                    return False
+                logging.info(f"Loading model {self.key} version {version} in the background")
+                model = self.loader()
+                if self.prepare is not None:
+                    self.prepare(model)
+                ModelCache._models[self.key] = CachedModel(model=model, version=version, checked_at=time.monotonic())
+            logging.info(f"Swapped in model {self.key} version {version}")
+            return True
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                logging.exception(f"Polling model {self.key} failed, keeping the loaded model")
+
+
+class ModelCache:
+    """
+    This class keeps loaded models for the whole process, shared by every request and pipeline object.
+    A model is keyed by where it is loaded from and reloaded only when its version changes, as reported
+    by version_fn, e.g. the version the model registry serves.
+    Versions are checked at most once per check interval, in between a cached model is returned without
+    any I/O. ModelPusher publishes the model it pushes to the registry so the next request picks it up
+    right away. Keys with a ModelWatcher are never checked on the request path, the watcher polls
+    their version in the background and swaps new models in.
+    """
+    _models: Dict[str, CachedModel] = {}
+    _watchers: Dict[str, ModelWatcher] = {}
+    _load_locks: Dict[str, threading.Lock] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_load_lock(cls, key: str) -> threading.Lock:
+        with cls._lock:
+            return cls._load_locks.setdefault(key, threading.Lock())
+
+    @classmethod
+    def get(cls, key: str, version_fn: Callable[[], Hashable], loader: Callable[[], object],
+            check_interval: float = MODEL_CACHE_CHECK_INTERVAL_SECONDS) -> object:
+        """
+        Method Name :   get
+        Description :   This method returns the model cached under key. Once check_interval seconds have
+                        passed since the last check, version_fn is called and the model is reloaded with
+                        loader if the version differs from the cached one. Concurrent callers of one key
+                        wait for a single load.
+
+        Output      :   The loaded model
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            cached = cls._models.get(key)
+            if cached is not None and (key in cls._watchers or time.monotonic() - cached.checked_at < check_interval):
+                return cached.model
+
+            with cls._get_load_lock(key):
+                cached = cls._models.get(key)
+                now = time.monotonic()
+                if cached is not None and now - cached.checked_at < check_interval:
+                    return cached.model
+                version = version_fn()
+                if cached is not None and cached.version == version:
+                    cls._models[key] = CachedModel(model=cached.model, version=version, checked_at=now)
+                    return cached.model
+
+                logging.info(f"Loading model {key} version {version}")
+                model = loader()
+                cls._models[key] = CachedModel(model=model, version=version, checked_at=time.monotonic())
+                return model
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @classmethod
+    def publish(cls, key: str, model: object, version: Hashable) -> None:
+        """
+        Replace the model cached under key, requests already holding the previous model finish with it
+        """
+        with cls._get_load_lock(key):
+            cls._models[key] = CachedModel(model=model, version=version, checked_at=time.monotonic())
+        logging.info(f"Published model {key} version {version}")
+
+    @classmethod
+    def watch(cls, key: str, version_fn: Callable[[], Hashable], loader: Callable[[], object],
+              prepare: Optional[Callable[[object], None]] = None,
+              interval: float = MODEL_CACHE_WATCH_INTERVAL_SECONDS) -> ModelWatcher:
+        """
+        Start a ModelWatcher hot reloading the model cached under key, a key is watched at most once
+        """
+        with cls._lock:
+            watcher = cls._watchers.get(key)
+            if watcher is None:
+                watcher = ModelWatcher(key=key, version_fn=version_fn, loader=loader, prepare=prepare,
+                                       interval=interval)
+                cls._watchers[key] = watcher
+                watcher.start()
+                logging.info(f"Watching model {key} every {interval}s")
+        return watcher
+
+    @classmethod
+    def unwatch(cls, key: Optional[str] = None) -> None:
+        """
+        Stop the watcher of key, or every watcher, the key falls back to checks on the request path
+        """
+        with cls._lock:
+            keys = list(cls._watchers) if key is None else [key]
+            for watched_key in keys:
+                watcher = cls._watchers.pop(watched_key, None)
+                if watcher is not None:
+                    watcher.stop()
+
+    @classmethod
+    def invalidate(cls, key: Optional[str] = None) -> None:
+        """
+        Drop the model cached under key, or every cached model, the next get loads it again
+        """
+        with cls._lock:
+            if key is None:
+                cls._models.clear()
+            else:
+                cls._models.pop(key, None)
@@ -0,0 +1,175 @@
+import sys
+import json
+import datetime
+from typing import List, Optional, Tuple
+from botocore.exceptions import ClientError
+from src.forest.cloud_storage.aws_storage import SimpleStorageService
+from src.forest.constants import (MODEL_FILE_NAME, MODEL_REGISTRY_HISTORY_SIZE, MODEL_REGISTRY_MANIFEST_FILE_NAME,
+                                  MODEL_REGISTRY_VERSIONS_DIR)
+from src.forest.exception import CustomException
+from src.forest.logger import logging
+from src.forest.utils.main_utils import get_file_digest
+
+
+class ModelRegistry:
+    """
+    This class is a versioned model registry under one prefix of an S3 bucket.
+    Every pushed model is stored once as an immutable object named by the sha256 of its content,
+    prefix/versions/<sha256>.pkl, and prefix/manifest.json points to the version being served.
+    A push uploads the version object first and replaces the manifest last, so readers see either the
+    old or the new model and never a partial upload. The manifest keeps the recent versions for rollback.
+    Registries written before the manifest existed are read from the legacy prefix/model.pkl key.
+    """
+
+    def __init__(self, bucket_name: str, prefix: str, s3: Optional[SimpleStorageService] = None):
+        self.bucket_name = bucket_name
+        self.prefix = prefix.strip("/")
+        self.s3 = SimpleStorageService() if s3 is None else s3
+        self.manifest_key = f"{self.prefix}/{MODEL_REGISTRY_MANIFEST_FILE_NAME}"
+        self.legacy_key = f"{self.prefix}/{MODEL_FILE_NAME}"
+
+    def get_version_key(self, version: str) -> str:
+        return f"{self.prefix}/{MODEL_REGISTRY_VERSIONS_DIR}/{version}.pkl"
+
+    @staticmethod
+    def _is_missing(error: ClientError) -> bool:
+        return error.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound")
+
+    def _object_exists(self, key: str) -> bool:
+        return self.s3.get_object_metadata(self.bucket_name, key) is not None
+
+    def get_manifest(self) -> Optional[dict]:
+        """
+        Method Name :   get_manifest
+        Description :   This method reads the manifest of the registry
+
+        Output      :   manifest dict, None when the registry has no manifest yet
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            response = self.s3.s3_client.get_object(Bucket=self.bucket_name, Key=self.manifest_key)
+            return json.loads(response["Body"].read())
+        except ClientError as e:
+            if self._is_missing(e):
+                return None
+            raise CustomException(e, sys) from e
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def resolve(self) -> Tuple[str, str]:
+        """
+        Method Name :   resolve
+        Description :   This method resolves the served model through the manifest, or falls back to the
+                        legacy model key versioned by its ETag
+
+        Output      :   (version, key of the model object)
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            manifest = self.get_manifest()
+            if manifest is not None:
+                return manifest["version"], manifest["model_key"]
+            metadata = self.s3.get_object_metadata(self.bucket_name, self.legacy_key)
+            if metadata is None:
+                raise FileNotFoundError(f"No model in {self.bucket_name}/{self.prefix}")
+            return metadata["ETag"].strip('"'), self.legacy_key
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def is_model_present(self) -> bool:
+        try:
+            return self.get_manifest() is not None or self._object_exists(self.legacy_key)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def list_versions(self) -> List[str]:
+        """
+        Versions kept in the manifest history, the served version first
+        """
+        manifest = self.get_manifest()
+        return [] if manifest is None else [manifest["version"]] + manifest["history"]
+
+    def push(self, from_file: str) -> str:
+        """
+        Method Name :   push
+        Description :   This method uploads the model file as an immutable version object, skipped when the
+                        same content was pushed before, and then promotes it
+
+        Output      :   version of the pushed model
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            version = get_file_digest(from_file)
+            version_key = self.get_version_key(version)
+            if self._object_exists(version_key):
+                logging.info(f"Model version {version} is already in the registry")
+            else:
+                self.s3.upload_file(from_file, to_filename=version_key, bucket_name=self.bucket_name, remove=False)
+            self.promote(version)
+            return version
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def promote(self, version: str) -> dict:
+        """
+        Method Name :   promote
+        Description :   This method points the manifest to an already uploaded version, the single write
+                        that switches every reader of the registry to it
+
+        Output      :   the new manifest
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            version_key = self.get_version_key(version)
+            if not self._object_exists(version_key):
+                raise ValueError(f"Model version {version} is not in the registry")
+            previous = self.get_manifest()
+            history = [] if previous is None else [previous["version"]] + previous["history"]
+            manifest = {
+                "version": version,
+                "model_key": version_key,
+                "promoted_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "history": [old for old in history if old != version][:MODEL_REGISTRY_HISTORY_SIZE],
+            }
+            self.s3.s3_client.put_object(Bucket=self.bucket_name, Key=self.manifest_key,
+                                         Body=json.dumps(manifest, indent=2).encode(),
+                                         ContentType="application/json")
+            logging.info(f"Promoted model version {version} in {self.bucket_name}/{self.prefix}")
+            return manifest
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def rollback(self) -> dict:
+        """
+        Promote the version served before the current one
+        """
+        try:
+            versions = self.list_versions()
+            if len(versions) < 2:
+                raise ValueError("No previous model version to roll back to")
+            return self.promote(versions[1])
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def load_model(self, version: Optional[str] = None) -> object:
+        """
+        Method Name :   load_model
+        Description :   This method downloads and deserializes a model version, the served one by default
+
+        Output      :   The loaded model
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            model_key = self.resolve()[1] if version is None else self.get_version_key(version)
+            return self.read_model(model_key)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def read_model(self, model_key: str) -> object:
+        """
+        Deserialize the model object at model_key of the registry bucket, downloaded through the S3 cache
+        """
+        try:
+            return self.s3.load_model(model_key, bucket_name=self.bucket_name)
+        except Exception as e:
+            raise CustomException(e, sys) from e
@@ -1,12 +1,17 @@
+import os
 import sys
 from src.forest.cloud_storage.aws_storage import SimpleStorageService
 from src.forest.exception import CustomException
 from src.forest.entity.estimator import ForestModel
+from src.forest.entity.model_registry import ModelRegistry
 from pandas import DataFrame
+from typing import Hashable, Optional, Tuple
+
 
 class ForestEstimator:
     """
-    This class is used to save and retrieve sensor model in s3 bucket and to do prediction
+    This class is used to save and retrieve sensor model in s3 bucket and to do prediction.
+    Models are kept in the versioned ModelRegistry under the directory of model_path.
     """
 
     def __init__(self,bucket_name,model_path,):
@@ -17,37 +22,57 @@ class ForestEstimator:
         self.bucket_name = bucket_name
         self.s3 = SimpleStorageService()
         self.model_path = model_path
+        self.registry = ModelRegistry(bucket_name=bucket_name, prefix=os.path.dirname(model_path), s3=self.s3)
         self.loaded_model:ForestModel=None
+        self._resolved: Optional[Tuple[str, str]] = None
 
 
     def is_model_present(self,model_path):
         try:
-            return self.s3.s3_key_path_available(bucket_name=self.bucket_name, s3_key=model_path)
+            return self.registry.is_model_present()
         except CustomException as e:
             print(e)
             return False
 
+    @property
+    def model_uri(self) -> str:
+        return f"s3://{self.bucket_name}/{self.model_path}"
+
+    def get_model_version(self) -> Hashable:
+        """
+        Version of the served model resolved through the registry manifest. The next load_model loads
+        exactly this version, so a cache recording it never holds a different model.
+        """
+        try:
+            self._resolved = self.registry.resolve()
+            return self._resolved[0]
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
     def load_model(self,)->ForestModel:
         """
-        Load the model from the model_path
+        Load the model version resolved by the last get_model_version, or the served one
         :return:
         """
+        try:
+            resolved, self._resolved = self._resolved, None
+            model_key = self.registry.resolve()[1] if resolved is None else resolved[1]
+            return self.registry.read_model(model_key)
+        except Exception as e:
+            raise CustomException(e, sys) from e
 
-        return self.s3.load_model(self.model_path,bucket_name=self.bucket_name)
-
-    def save_model(self,from_file,remove:bool=False)->None:
+    def save_model(self,from_file,remove:bool=False)->str:
         """
-        Save the model to the model_path
+        Push the model to the registry under the directory of model_path and promote it
         :param from_file: Your local system model path
         :param remove: By default it is false that mean you will have your model locally available in your system folder
-        :return:
+        :return: version of the pushed model
         """
         try:
-            self.s3.upload_file(from_file,
-                                to_filename=self.model_path,
-                                bucket_name=self.bucket_name,
-                                remove=remove
-                                )
+            version = self.registry.push(from_file)
+            if remove is True:
+                os.remove(from_file)
+            return version
         except Exception as e:
             raise CustomException(e, sys)
 
@@ -0,0 +1,246 @@
+import re
+import sys
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Tuple
+from src.forest.constants import SCHEMA_VALIDATOR_MAX_ERROR_ROWS
+from src.forest.exception import CustomException
+from src.forest.utils.main_utils import get_schema_dtypes
+
+
+@dataclass
+class ColumnCheck:
+    column: str
+    dtype: str
+    value_range: Optional[Tuple[float, float]]
+    max_null_rate: float
+    one_hot: bool
+
+
+@dataclass
+class ColumnReport:
+    column: str
+    present: bool
+    dtype: Optional[str] = None
+    expected_dtype: Optional[str] = None
+    null_count: int = 0
+    null_rate: float = 0.0
+    invalid_dtype_count: int = 0
+    out_of_range_count: int = 0
+    errors: List[str] = field(default_factory=list)
+    error_rows: Dict[str, List[int]] = field(default_factory=dict)
+
+
+@dataclass
+class GroupReport:
+    group: str
+    columns: List[str]
+    rule: str
+    violation_count: int = 0
+    error_rows: List[int] = field(default_factory=list)
+
+
+@dataclass
+class ValidationReport:
+    n_rows: int
+    valid: bool
+    errors: List[str]
+    columns: Dict[str, ColumnReport]
+    groups: Dict[str, GroupReport]
+    unexpected_columns: List[str]
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class SchemaValidator:
+    """
+    This class validates dataframes against config/schema.yaml. The schema is compiled once into a
+    check per column: the dtype of the columns section, the allowed range and null rate of the
+    validation section, and membership of a one hot group. validate makes one vectorized pass over
+    each column for presence, dtype, range and nulls, and sums each one hot group into a row count
+    that has to be exactly one, or at most one when columns of the group are not validated, missing
+    or null. Failing rows are kept per column under the message of the failed check.
+    """
+
+    def __init__(self, checks: List[ColumnCheck], groups: Dict[str, List[str]], check_null_rate: bool = True,
+                 allow_unexpected_columns: bool = True):
+        self.checks = checks
+        self.groups = groups
+        self.check_null_rate = check_null_rate
+        self.allow_unexpected_columns = allow_unexpected_columns
+        self._check_columns = {check.column for check in checks}
+        self._column_groups = {column: group for group, columns in groups.items() for column in columns}
+        self.complete_groups = {group for group, columns in groups.items()
+                                if all(column in self._check_columns for column in columns)}
+
+    @classmethod
+    def from_schema(cls, schema_config: dict, columns: Optional[List[str]] = None, check_null_rate: bool = True,
+                    allow_unexpected_columns: bool = True) -> "SchemaValidator":
+        """
+        Method Name :   from_schema
+        Description :   This method compiles the checks of schema.yaml, for columns only when given
+
+        Output      :   SchemaValidator
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            schema_dtypes = get_schema_dtypes(schema_config)
+            validation_config = schema_config.get("validation", {})
+            ranges = validation_config.get("ranges", {})
+            max_null_rates = validation_config.get("max_null_rates", {})
+            group_columns = {
+                prefix: [column for column in schema_dtypes if re.fullmatch(rf"{re.escape(prefix)}\d+", column)]
+                for prefix in validation_config.get("one_hot_groups", [])
+            }
+            one_hot_columns = {column for group in group_columns.values() for column in group}
+            checks = [
+                ColumnCheck(column=column, dtype=dtype,
+                            value_range=tuple(ranges[column]) if column in ranges else None,
+                            max_null_rate=max_null_rates.get(column, validation_config.get("max_null_rate", 0.0)),
+                            one_hot=column in one_hot_columns)
+                for column, dtype in schema_dtypes.items() if columns is None or column in columns
+            ]
+            return cls(checks, group_columns, check_null_rate=check_null_rate,
+                       allow_unexpected_columns=allow_unexpected_columns)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    @staticmethod
+    def _error_rows(mask: np.ndarray) -> List[int]:
+        return np.flatnonzero(mask)[:SCHEMA_VALIDATOR_MAX_ERROR_ROWS].tolist()
+
+    @staticmethod
+    def _get_values(series: pd.Series) -> Optional[np.ndarray]:
+        """
+        Numeric values of a column, categories are replaced by their values, None for non numeric data
+        """
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(series.cat.categories.dtype)
+        if series.dtype.kind not in "biuf":
+            return None
+        return series.to_numpy()
+
+    def _check_column(self, check: ColumnCheck, values: Optional[np.ndarray], dtype: str,
+                      n_rows: int) -> ColumnReport:
+        report = ColumnReport(column=check.column, present=True, dtype=dtype, expected_dtype=check.dtype)
+        if values is None:
+            report.invalid_dtype_count = n_rows
+            report.errors.append(f"non numeric dtype {dtype}")
+            return report
+
+        is_float = values.dtype.kind == "f"
+        nulls = np.isnan(values) if is_float else None
+        report.null_count = 0 if nulls is None else int(np.count_nonzero(nulls))
+        report.null_rate = report.null_count / n_rows if n_rows else 0.0
+        if self.check_null_rate and report.null_rate > check.max_null_rate:
+            report.errors.append(f"null rate {report.null_rate:.4f} above {check.max_null_rate}")
+
+        expected = np.dtype("int64" if check.dtype in ("int", "category") else check.dtype)
+        if expected.kind in "iu":
+            invalid = np.zeros(n_rows, dtype=bool)
+            if is_float:
+                with np.errstate(invalid="ignore"):
+                    invalid = np.not_equal(values, np.floor(values)) & ~nulls
+            if values.dtype.kind in "iuf" and values.dtype != expected:
+                info = np.iinfo(expected)
+                invalid |= (values < info.min) | (values > info.max)
+            report.invalid_dtype_count = int(np.count_nonzero(invalid))
+            if report.invalid_dtype_count:
+                message = f"not representable as {check.dtype}"
+                report.errors.append(f"{report.invalid_dtype_count} values {message}")
+                report.error_rows[message] = self._error_rows(invalid)
+
+        value_range = (0, 1) if check.one_hot else check.value_range
+        if value_range is not None:
+            low, high = value_range
+            out_of_range = (values < low) | (values > high)
+            report.out_of_range_count = int(np.count_nonzero(out_of_range))
+            if report.out_of_range_count:
+                message = f"outside [{low}, {high}]"
+                report.errors.append(f"{report.out_of_range_count} values {message}")
+                report.error_rows[message] = self._error_rows(out_of_range)
+        return report
+
+    def validate(self, dataframe: pd.DataFrame) -> ValidationReport:
+        """
+        Method Name :   validate
+        Description :   This method checks every compiled column and one hot group of the dataframe
+
+        Output      :   ValidationReport, valid when no check failed, failing rows are listed by position
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            column_values = {column: (self._get_values(dataframe[column]), str(dataframe[column].dtype))
+                             for column in dataframe.columns if column in self._check_columns}
+            return self._validate(len(dataframe), column_values, list(dataframe.columns))
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def validate_values(self, values: np.ndarray, columns: List[str]) -> ValidationReport:
+        """
+        Method Name :   validate_values
+        Description :   This method checks a 2d numeric array whose columns are named by columns, without the
+                        cost of building a dataframe for the few rows of an online request
+
+        Output      :   ValidationReport, valid when no check failed, failing rows are listed by position
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            if values.ndim != 2 or values.shape[1] != len(columns):
+                raise ValueError(f"Expected {len(columns)} columns of values, got shape {values.shape}")
+            column_values = {column: (values[:, position], str(values.dtype))
+                             for position, column in enumerate(columns) if column in self._check_columns}
+            return self._validate(len(values), column_values, list(columns))
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def _validate(self, n_rows: int, column_values: Dict[str, Tuple[Optional[np.ndarray], str]],
+                  all_columns: List[str]) -> ValidationReport:
+        """
+        Runs the compiled checks over the numeric values and dtype name of every present schema column
+        """
+        columns: Dict[str, ColumnReport] = {}
+        group_sums = {group: np.zeros(n_rows, dtype=np.float64) for group in self.groups}
+        group_nulls = {group: np.zeros(n_rows, dtype=np.int64) for group in self.groups}
+        group_found = {group: 0 for group in self.groups}
+
+        for check in self.checks:
+            if check.column not in column_values:
+                columns[check.column] = ColumnReport(column=check.column, present=False,
+                                                     expected_dtype=check.dtype, errors=["missing column"])
+                continue
+            values, dtype = column_values[check.column]
+            columns[check.column] = self._check_column(check, values, dtype, n_rows)
+            group = self._column_groups.get(check.column)
+            if group is not None and values is not None:
+                if values.dtype.kind == "f":
+                    nulls = np.isnan(values)
+                    group_nulls[group] += nulls
+                    values = np.where(nulls, 0.0, values)
+                group_sums[group] += values
+                group_found[group] += 1
+
+        groups: Dict[str, GroupReport] = {}
+        for group, group_columns in self.groups.items():
+            if not group_found[group]:
+                continue
+            exactly_one = group in self.complete_groups and group_found[group] == len(group_columns)
+            violations = group_sums[group] > 1
+            if exactly_one:
+                # a row with nulls in the group may still have its one column set among them
+                violations |= (group_sums[group] != 1) & (group_nulls[group] == 0)
+            groups[group] = GroupReport(group=group, columns=group_columns,
+                                        rule="exactly one" if exactly_one else "at most one",
+                                        violation_count=int(np.count_nonzero(violations)),
+                                        error_rows=self._error_rows(violations))
+
+        unexpected_columns = [column for column in all_columns if column not in self._check_columns]
+        errors = [f"{report.column}: {error}" for report in columns.values() for error in report.errors]
+        errors += [f"{report.group}: {report.violation_count} rows without {report.rule} column set"
+                   for report in groups.values() if report.violation_count]
+        if unexpected_columns and not self.allow_unexpected_columns:
+            errors.append(f"columns not in schema: {unexpected_columns}")
+        return ValidationReport(n_rows=n_rows, valid=not errors, errors=errors, columns=columns,
+                                groups=groups, unexpected_columns=unexpected_columns)
@@ -0,0 +1,97 @@
+import sys
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, Optional
+from src.forest.constants import JOB_MANAGER_MAX_WORKERS, JOB_MANAGER_HISTORY_SIZE
+from src.forest.exception import CustomException
+from src.forest.logger import logging
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+@dataclass
+class Job:
+    job_id: str
+    job_type: str
+    status: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result: Optional[object] = None
+
+
+class JobManager:
+    """
+    This class runs the long pipelines of the app, training and batch prediction, on background
+    worker threads so request handlers return at once with a job id that can be polled.
+    Jobs submitted with deduplicate reuse the queued or running job of the same type instead of
+    starting another one, so two training runs never share the artifact directory.
+    """
+
+    def __init__(self, max_workers: int = JOB_MANAGER_MAX_WORKERS, history_size: int = JOB_MANAGER_HISTORY_SIZE):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline-job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[str, str] = {}
+        self._history_size = history_size
+        self._lock = threading.Lock()
+
+    def submit(self, job_type: str, fn: Callable[[], object], deduplicate: bool = False) -> Job:
+        """
+        Method Name :   submit
+        Description :   This method queues fn as a job of job_type, with deduplicate the job already
+                        queued or running for job_type is returned instead of queuing a new one
+
+        Output      :   The submitted or the deduplicated Job
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            with self._lock:
+                if deduplicate and job_type in self._active:
+                    return self._jobs[self._active[job_type]]
+                job = Job(job_id=uuid.uuid4().hex, job_type=job_type, status=JOB_QUEUED, created_at=time.time())
+                self._jobs[job.job_id] = job
+                if deduplicate:
+                    self._active[job_type] = job.job_id
+                self._evict_finished_jobs()
+            self._executor.submit(self._run, job, fn, deduplicate)
+            logging.info(f"Queued {job_type} job {job.job_id}")
+            return job
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def _run(self, job: Job, fn: Callable[[], object], deduplicate: bool) -> None:
+        job.started_at = time.time()
+        job.status = JOB_RUNNING
+        try:
+            job.result = fn()
+            job.status = JOB_SUCCEEDED
+        except Exception as e:
+            logging.exception(f"{job.job_type} job {job.job_id} failed")
+            job.error = str(e)
+            job.status = JOB_FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if deduplicate and self._active.get(job.job_type) == job.job_id:
+                    del self._active[job.job_type]
+
+    def _evict_finished_jobs(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in (JOB_SUCCEEDED, JOB_FAILED)]
+        for job_id in finished[:max(0, len(self._jobs) - self._history_size)]:
+            del self._jobs[job_id]
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return None if job is None else asdict(job)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,100 @@
+import sys
+import asyncio
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+from src.forest.constants import MICRO_BATCH_MAX_ROWS, MICRO_BATCH_MAX_WAIT_MS
+from src.forest.exception import CustomException
+from src.forest.logger import logging
+
+
+class MicroBatcher:
+    """
+    This class coalesces the feature rows of concurrent online requests into one model call.
+    Rows wait in a queue until max_batch_rows rows are pending or the first of them has waited
+    max_wait_ms, a request that would take the batch over max_batch_rows waits for the next one,
+    then predict_fn scores the stacked batch on a dedicated model thread and every
+    request gets back its own slice of the result.
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], Tuple[object, np.ndarray]],
+                 max_batch_rows: int = MICRO_BATCH_MAX_ROWS, max_wait_ms: float = MICRO_BATCH_MAX_WAIT_MS):
+        """
+        :param predict_fn: scores a 2d array of feature rows and returns (context, results) with one result
+                           row per input row, context is shared by the batch, e.g. the classes of the model
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._held: Optional[Tuple[np.ndarray, asyncio.Future]] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="micro-batch")
+
+    def start(self) -> None:
+        """
+        Start the batching loop on the running event loop
+        """
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, values: np.ndarray) -> Tuple[object, np.ndarray]:
+        """
+        Queue the rows of values for the next batch and wait for the batch context and their results
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((values, future))
+        return await future
+
+    async def _next_batch(self) -> List[Tuple[np.ndarray, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = [self._held if self._held is not None else await self._queue.get()]
+        self._held = None
+        n_rows = len(batch[0][0])
+        deadline = loop.time() + self.max_wait
+        while n_rows < self.max_batch_rows:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if n_rows + len(item[0]) > self.max_batch_rows:
+                # the request would overflow the batch, it opens the next one instead
+                self._held = item
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            batch = [(values, future) for values, future in batch if not future.done()]
+            if not batch:
+                continue
+            try:
+                stacked = batch[0][0] if len(batch) == 1 else np.concatenate([values for values, _ in batch])
+                context, results = await loop.run_in_executor(self._executor, self.predict_fn, stacked)
+                offset = 0
+                for values, future in batch:
+                    if not future.done():
+                        future.set_result((context, results[offset:offset + len(values)]))
+                    offset += len(values)
+            except Exception as e:
+                logging.exception(f"Micro batch of {len(batch)} requests failed")
+                error = CustomException(e, sys)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
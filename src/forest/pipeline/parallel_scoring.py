@@ -0,0 +1,128 @@
+import os
+import sys
+import shutil
+import tempfile
+import multiprocessing
+import numpy as np
+from collections import deque
+from functools import partial
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from pandas import DataFrame
+from src.forest.constants.prediction_pipeline import PREDICTION_MP_START_METHOD
+from src.forest.exception import CustomException
+from src.forest.logger import logging
+from src.forest.utils.model_serialization import load_model_object, save_model_object
+
+# model and input columns of a scoring worker process, set before fork or by _init_worker
+_WORKER_MODEL: Optional[object] = None
+_WORKER_COLUMNS: Optional[List[str]] = None
+# why the model could not be loaded, reported by the first task instead of raised by the initializer,
+# the pool would restart a worker whose initializer raises forever
+_WORKER_ERROR: Optional[str] = None
+
+
+def _init_worker(model_loader: Optional[Callable[[], object]], feature_columns: List[str]) -> None:
+    global _WORKER_MODEL, _WORKER_COLUMNS, _WORKER_ERROR
+    _WORKER_COLUMNS = feature_columns
+    if _WORKER_MODEL is None:
+        # forkserver and spawn workers map the model file written by the parent
+        try:
+            _WORKER_MODEL = model_loader()
+        except Exception as e:
+            _WORKER_ERROR = f"{type(e).__name__}: {e}"
+
+
+def _predict_values(values: np.ndarray) -> np.ndarray:
+    if _WORKER_MODEL is None:
+        raise RuntimeError(f"Scoring worker could not load the model: {_WORKER_ERROR}")
+    return _WORKER_MODEL.predict(DataFrame(values, columns=_WORKER_COLUMNS, copy=False))
+
+
+class ParallelScorer:
+    """
+    This class scores a stream of dataframe chunks on a pool of worker processes and yields the
+    chunks back in input order together with their predictions.
+    Workers score with exactly the model object given to the scorer, whatever the registry serves
+    meanwhile. With the default forkserver or spawn start methods it is written once per pool as a
+    compact model file that every worker memory maps, so the workers read one copy of the file from
+    the page cache instead of a pickle each, and sklearn only copies the tree node arrays into its own
+    buffers. With the opt in fork start method, only safe from single threaded processes, workers
+    inherit the model copy on write from the parent. Only the model input columns of each chunk travel
+    to the workers, and at most max_pending chunks are in flight so memory stays bounded whatever the
+    length of the stream. With n_jobs 1 chunks are scored inline.
+    """
+
+    def __init__(self, model: object, feature_columns: List[str], n_jobs: int = -1,
+                 max_pending: Optional[int] = None, start_method: str = PREDICTION_MP_START_METHOD):
+        self.model = model
+        self.feature_columns = feature_columns
+        self.n_jobs = (os.cpu_count() or 1) if n_jobs is None or n_jobs < 1 else n_jobs
+        self.max_pending = 2 * self.n_jobs if max_pending is None else max_pending
+        self.start_method = start_method if start_method in multiprocessing.get_all_start_methods() else "spawn"
+        self._pool = None
+        self._model_dir: Optional[str] = None
+
+    def __enter__(self) -> "ParallelScorer":
+        global _WORKER_MODEL
+        if self.n_jobs > 1:
+            context = multiprocessing.get_context(self.start_method)
+            model_loader = None
+            if self.start_method == "fork":
+                _WORKER_MODEL = self.model
+            else:
+                self._model_dir = tempfile.mkdtemp(prefix="forest-scoring-")
+                model_file_path = os.path.join(self._model_dir, "model.pkl")
+                save_model_object(model_file_path, self.model)
+                model_loader = partial(load_model_object, model_file_path)
+            try:
+                self._pool = context.Pool(self.n_jobs, initializer=_init_worker,
+                                          initargs=(model_loader, self.feature_columns))
+            except Exception:
+                self._remove_model_dir()
+                raise
+            finally:
+                _WORKER_MODEL = None
+            logging.info(f"Started {self.n_jobs} {self.start_method} scoring workers")
+        return self
+
+    def _remove_model_dir(self) -> None:
+        if self._model_dir is not None:
+            shutil.rmtree(self._model_dir, ignore_errors=True)
+            self._model_dir = None
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self._pool is not None:
+            if exc_type is None:
+                self._pool.close()
+            else:
+                self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        self._remove_model_dir()
+
+    def score(self, chunks: Iterable[DataFrame]) -> Iterator[Tuple[DataFrame, np.ndarray]]:
+        """
+        Method Name :   score
+        Description :   This method predicts every chunk, in parallel when the pool is running
+
+        Output      :   Generator of (chunk, predictions) in the order of chunks
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            if self._pool is None:
+                for chunk in chunks:
+                    yield chunk, self.model.predict(chunk)
+                return
+
+            pending = deque()
+            for chunk in chunks:
+                values = chunk[self.feature_columns].to_numpy(dtype=np.float64)
+                pending.append((chunk, self._pool.apply_async(_predict_values, (values,))))
+                if len(pending) >= self.max_pending:
+                    chunk, result = pending.popleft()
+                    yield chunk, result.get()
+            while pending:
+                chunk, result = pending.popleft()
+                yield chunk, result.get()
+        except Exception as e:
+            raise CustomException(e, sys) from e
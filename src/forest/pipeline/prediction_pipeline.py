@@ -1,4 +1,7 @@
+import os
 import sys
+import time
+import uuid
 import numpy as np
 import pandas as pd
 from pandas import DataFrame
@@ -7,8 +10,13 @@ from src.forest.exception import CustomException
 from src.forest.logger import logging
 from src.forest.entity.config_entity import PredictionPipelineConfig
 from src.forest.entity.s3_estimator import ForestEstimator
+from src.forest.entity.model_cache import ModelCache
+from src.forest.entity.schema_validator import SchemaValidator
+from src.forest.pipeline.parallel_scoring import ParallelScorer
 
 from src.forest.utils.main_utils import *
+from src.forest.constants import SCHEMA_FILE_PATH, TARGET_COLUMN
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 class PredictionPipeline:
@@ -19,6 +27,15 @@ class PredictionPipeline:
         try:
             self.prediction_pipeline_config = prediction_pipeline_config
             self.s3 = SimpleStorageService()
+            self.estimator = ForestEstimator(bucket_name=self.prediction_pipeline_config.model_bucket_name,
+                                             model_path=self.prediction_pipeline_config.model_file_path)
+            self._schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+            self.feature_columns: List[str] = self._schema_config["numerical_columns"]
+            self.schema_columns = {column for column_dtype in self._schema_config["columns"]
+                                   for column in column_dtype} - {TARGET_COLUMN}
+            # online rows may hold nulls, the preprocessor imputes them
+            self.schema_validator = SchemaValidator.from_schema(self._schema_config, columns=self.feature_columns,
+                                                                check_null_rate=False)
         except Exception as e:
             raise CustomException(e,sys)
     
@@ -36,43 +53,238 @@ class PredictionPipeline:
 
     
 
+    def get_trained_model(self) -> object:
+        """
+        The model of the registry used by ForestEstimator, resident in ModelCache and reloaded when
+        the registry manifest points to a new version
+        """
+        return ModelCache.get(key=self.estimator.model_uri, version_fn=self.estimator.get_model_version,
+                              loader=self.estimator.load_model)
+
+    def watch_trained_model(self, interval: Optional[float] = None) -> None:
+        """
+        Hot reload the registry model: a background watcher polls the registry manifest and swaps in a
+        new model once it is loaded and has scored the warm up batch, requests keep the model they hold
+        """
+        values = self.get_warm_up_values(self.prediction_pipeline_config.warm_up_rows)
+        ModelCache.watch(key=self.estimator.model_uri, version_fn=self.estimator.get_model_version,
+                         loader=self.estimator.load_model,
+                         prepare=lambda model: self.warm_model(model, values),
+                         interval=self.prediction_pipeline_config.watch_interval if interval is None else interval)
+
     def predict(self,dataframe)->np.ndarray:
         try:
             logging.info("Entered predict method of PredictionPipeline class")
-            '''model = ForestEstimator(bucket_name=self.prediction_pipeline_config.model_bucket_name,
-                                    model_path=self.prediction_pipeline_config.model_file_path)
-'''
-            trained_model = load_object(file_path=self.prediction_pipeline_config.trained_model_file_path)                       
+            trained_model = self.get_trained_model()
             logging.info("Exited the predict method of PredictionPipeline class")
             return trained_model.predict(dataframe)
         except Exception as e:
             raise CustomException(e,sys)
 
 
-    def initiate_prediction(self,)->None:
+    def validate_rows(self, rows: List[Dict[str, Optional[float]]]) -> List[dict]:
+        """
+        Checks feature rows against schema.yaml: every model input column has to be present, other keys
+        have to be schema columns, and the values have to pass the SchemaValidator dtype, range and one hot
+        checks. Values may be null, the preprocessor imputes them.
+        :return: one error dict per problem, empty when the rows are valid
+        """
+        errors = []
+        if not rows:
+            errors.append({"row": None, "column": None, "error": "no rows to predict"})
+        for row_number, row in enumerate(rows):
+            for column in self.feature_columns:
+                if column not in row:
+                    errors.append({"row": row_number, "column": column, "error": "missing column"})
+            for column in row.keys() - self.schema_columns:
+                errors.append({"row": row_number, "column": column, "error": "column not in schema"})
+        if errors:
+            return errors
+
+        report = self.schema_validator.validate_values(self.get_feature_values(rows), self.feature_columns)
+        for column_report in report.columns.values():
+            for message, error_rows in column_report.error_rows.items():
+                errors += [{"row": row_number, "column": column_report.column, "error": f"value {message}"}
+                           for row_number in error_rows]
+        for group_report in report.groups.values():
+            errors += [{"row": row_number, "column": group_report.group,
+                        "error": f"{group_report.rule} of the one hot columns has to be 1"}
+                       for row_number in group_report.error_rows]
+        return errors
+
+    def get_feature_values(self, rows: List[Dict[str, Optional[float]]]) -> np.ndarray:
+        """
+        Model input columns of validated feature rows as a float64 array, nulls become NaN
+        """
+        return np.array([[row[column] for column in self.feature_columns] for row in rows], dtype=np.float64)
+
+    def predict_proba_values(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Method Name :   predict_proba_values
+        Description :   This method scores feature values laid out as get_feature_values with the model
+                        resident in ModelCache
+
+        Output      :   classes of the model and the class probabilities of every row
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            trained_model = self.get_trained_model()
+            dataframe = DataFrame(values, columns=self.feature_columns, copy=False)
+            return trained_model.classes_, trained_model.predict_proba(dataframe)
+        except Exception as e:
+            raise CustomException(e,sys)
+
+    def get_warm_up_values(self, n_rows: int) -> np.ndarray:
+        """
+        Synthetic feature rows laid out as get_feature_values that pass the schema_validator checks:
+        columns are drawn from their schema.yaml validation range, or from the range of their dtype
+        capped to [0, 1000], every one hot group has exactly one column set, and a few values are null
+        """
+        rng = np.random.default_rng(0)
+        positions = {column: position for position, column in enumerate(self.feature_columns)}
+        values = np.zeros((n_rows, len(self.feature_columns)), dtype=np.float64)
+        for check in self.schema_validator.checks:
+            if check.one_hot:
+                continue
+            dtype = np.dtype("int64" if check.dtype in ("int", "category") else check.dtype)
+            low, high = check.value_range if check.value_range is not None else \
+                (0, min(np.iinfo(dtype).max, 1000) if dtype.kind in "iu" else 1000)
+            column_values = rng.integers(low, high, size=n_rows, endpoint=True).astype(np.float64) \
+                if dtype.kind in "iu" else rng.uniform(low, high, size=n_rows)
+            column_values[rng.random(n_rows) < 0.01] = np.nan
+            values[:, positions[check.column]] = column_values
+        for group_columns in self.schema_validator.groups.values():
+            group_positions = [positions[column] for column in group_columns if column in positions]
+            if group_positions:
+                values[np.arange(n_rows), rng.choice(group_positions, size=n_rows)] = 1.0
+        return values
+
+    def warm_model(self, model: object, values: np.ndarray) -> None:
+        """
+        Score values with model once as a single row and once as a whole, which builds the structures
+        of both inference paths
+        """
+        for batch in (values[:1], values):
+            model.predict_proba(DataFrame(batch, columns=self.feature_columns, copy=False))
+
+    def warm_up(self, n_rows: Optional[int] = None) -> float:
+        """
+        Method Name :   warm_up
+        Description :   This method loads the registry model into ModelCache and scores a synthetic batch
+                        with it, once as a single row and once as n_rows rows, so the S3 client, the model
+                        and both inference paths with their derived structures are ready before traffic
+
+        Output      :   Seconds the warm up took
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            logging.info("Entered warm_up method of PredictionPipeline class")
+            start = time.perf_counter()
+            n_rows = self.prediction_pipeline_config.warm_up_rows if n_rows is None else n_rows
+            values = self.get_warm_up_values(max(n_rows, 1))
+            self.warm_model(self.get_trained_model(), values)
+            seconds = time.perf_counter() - start
+            logging.info(f"Warmed up model {self.estimator.model_uri} with {len(values)} rows in {seconds:.2f}s")
+            logging.info("Exited warm_up method of PredictionPipeline class")
+            return seconds
+        except Exception as e:
+            raise CustomException(e,sys)
+
+    @staticmethod
+    def format_predictions(classes: np.ndarray, probabilities: np.ndarray, return_probabilities: bool = False) -> dict:
+        response = {"predictions": classes[probabilities.argmax(axis=1)].tolist()}
+        if return_probabilities:
+            response["classes"] = classes.tolist()
+            response["probabilities"] = probabilities.tolist()
+        return response
+
+    def predict_rows(self, rows: List[Dict[str, Optional[float]]], return_probabilities: bool = False) -> dict:
+        """
+        Method Name :   predict_rows
+        Description :   This method scores already validated feature rows with the model resident in ModelCache
+
+        Output      :   dict with the predicted classes and, if asked for, the class probabilities
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            classes, probabilities = self.predict_proba_values(self.get_feature_values(rows))
+            return PredictionPipeline.format_predictions(classes, probabilities, return_probabilities)
+        except Exception as e:
+            raise CustomException(e,sys)
+
+    def get_output_key(self, prediction_id: str) -> str:
+        """
+        Bucket key of the output of one prediction run, <output_dir>/<prediction_id>/<output file stem>.<format>
+        """
+        config = self.prediction_pipeline_config
+        if config.output_format not in ("csv", "parquet"):
+            raise ValueError(f"Unsupported prediction output format {config.output_format}")
+        stem = os.path.splitext(config.output_file_name)[0]
+        return f"{config.output_dir}/{prediction_id}/{stem}.{config.output_format}"
+
+    def write_output(self, chunks: Iterable[DataFrame], prediction_id: Optional[str] = None) -> dict:
+        """
+        Method Name :   write_output
+        Description :   This method serializes annotated chunks as csv or parquet straight into a multipart
+                        upload under the key of the run, prediction_id defaults to a new uuid so concurrent
+                        runs never share an output
+
+        Output      :   dict with the bucket_name, key and number of rows of the output
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            config = self.prediction_pipeline_config
+            key = self.get_output_key(uuid.uuid4().hex if prediction_id is None else prediction_id)
+            with self.s3.open_multipart_writer(key, config.data_bucket_name) as writer:
+                n_rows = write_dataframe_chunks(writer, chunks, self._schema_config, file_format=config.output_format)
+            logging.info(f"Uploaded {n_rows} predictions to {key} in {config.data_bucket_name}")
+            return {"bucket_name": config.data_bucket_name, "key": key, "rows": n_rows}
+        except Exception as e:
+            raise CustomException(e,sys)
+
+    def initiate_prediction(self, prediction_id: Optional[str] = None)->DataFrame:
         try:
             logging.info("Entered initiate_prediction method of PredictionPipeline class")
             dataframe = self.get_data()
-            predicted_arr = self.predict(dataframe)
-            prediction = pd.DataFrame(list(predicted_arr))
-            prediction.columns = ['Cover_Type'] 
-            predicted_dataframe = pd.concat([dataframe,prediction],axis=1)
-            
-            self.s3.upload_df_as_csv(
-                predicted_dataframe,
-                self.prediction_pipeline_config.output_file_name,
-                self.prediction_pipeline_config.output_file_name,
-                self.prediction_pipeline_config.data_bucket_name,
-            )
-            logging.info("Uploaded artifacts folder to s3 bucket_name")
+            predicted_dataframe = dataframe
+            predicted_dataframe[TARGET_COLUMN] = self.predict(dataframe)
 
-            logging.info(f"File has uploaded to {predicted_dataframe}")
+            self.write_output([predicted_dataframe], prediction_id)
 
             logging.info("Exited initiate_prediction method of PredictionPipeline class")
             return predicted_dataframe
         except Exception as e:
             raise CustomException(e,sys)
 
+    def initiate_streaming_prediction(self, prediction_id: Optional[str] = None)->dict:
+        """
+        Method Name :   initiate_streaming_prediction
+        Description :   This method scores the prediction csv of the data bucket chunk by chunk while it
+                        streams from S3 and streams the annotated rows back through write_output.
+                        Chunks are scored on config.n_jobs worker processes and written in input order,
+                        memory holds a bounded window of chunks and the upload parts in flight whatever
+                        the file size
 
+        Output      :   dict with the bucket_name, key and number of rows of the output
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            logging.info("Entered initiate_streaming_prediction method of PredictionPipeline class")
+            config = self.prediction_pipeline_config
+            trained_model = self.get_trained_model()
+            scorer = ParallelScorer(trained_model, self.feature_columns, n_jobs=config.n_jobs,
+                                    start_method=config.mp_start_method)
 
+            def predicted_chunks() -> Iterator[DataFrame]:
+                chunks = self.s3.read_csv_chunks(config.data_file_path, config.data_bucket_name,
+                                                 chunksize=config.chunk_size)
+                for chunk, predictions in scorer.score(chunks):
+                    chunk[TARGET_COLUMN] = predictions
+                    yield chunk
 
+            with scorer:
+                output = self.write_output(predicted_chunks(), prediction_id)
+            logging.info("Exited initiate_streaming_prediction method of PredictionPipeline class")
+            return output
+        except Exception as e:
+            raise CustomException(e,sys)
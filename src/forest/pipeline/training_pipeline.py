@@ -1,4 +1,7 @@
 import os,sys
+import json
+from dataclasses import asdict, fields, is_dataclass
+from typing import Callable, List, Optional
 from src.forest.components.data_ingestion import DataIngestion
 from src.forest.components.data_validation import DataValidation
 from src.forest.components.data_transformation import DataTransformation
@@ -9,6 +12,9 @@ from src.forest.logger import logging
 from src.forest.exception import CustomException
 from src.forest.entity.config_entity import *
 from src.forest.entity.artifact_entity import *
+from src.forest.entity.artifact_cache import ArtifactCache
+from src.forest.constants import ARTIFACTS_DIR, STAGE_FINGERPRINT_DIR_NAME, SCHEMA_FILE_PATH
+from src.forest.utils.main_utils import compute_fingerprint, get_file_digest, read_yaml_file, write_yaml_file
 
 class TrainPipeline:
     def __init__(self):
@@ -18,11 +24,108 @@ class TrainPipeline:
         self.model_trainer_config = ModelTrainerConfig()
         self.model_evaluation_config = ModelEvaluationConfig()
         self.model_pusher_config = ModelPusherConfig()
-        
+        # stages run on their own write synchronously, run_pipeline swaps in a write behind cache per run
+        self.artifact_cache = ArtifactCache(write_behind=False)
+        self.stage_fingerprint_dir = os.path.join(ARTIFACTS_DIR, STAGE_FINGERPRINT_DIR_NAME)
+
+    @staticmethod
+    def get_artifact_paths(artifact: object) -> List[str]:
+        """
+        Every string or list of strings held by an artifact, the files among them identify its content
+        """
+        paths = []
+        for value in asdict(artifact).values():
+            if isinstance(value, str):
+                paths.append(value)
+            elif isinstance(value, list):
+                paths.extend(item for item in value if isinstance(item, str))
+        return paths
+
+    def get_artifact_file_digests(self, artifact: object) -> dict:
+        digests = {}
+        for path in self.get_artifact_paths(artifact):
+            self.artifact_cache.wait(path)
+            if os.path.isfile(path):
+                digests[path] = get_file_digest(path)
+        return digests
+
+    def get_stage_fingerprint(self, stage_name: str, input_artifact: object, config: object,
+                              yaml_file_paths: List[str]) -> str:
+        """
+        Fingerprint of everything a stage reads: its input artifact and the content of the files it points to,
+        its config entity and the yaml files driving it
+        """
+        try:
+            return compute_fingerprint(stage_name, asdict(input_artifact), self.get_artifact_file_digests(input_artifact),
+                                       vars(config), {path: get_file_digest(path) for path in yaml_file_paths})
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def build_artifact(artifact_cls: type, content: dict) -> object:
+        kwargs = {}
+        for field in fields(artifact_cls):
+            value = content[field.name]
+            if is_dataclass(field.type) and isinstance(value, dict):
+                value = TrainPipeline.build_artifact(field.type, value)
+            kwargs[field.name] = value
+        return artifact_cls(**kwargs)
+
+    def load_stage_artifact(self, stage_name: str, fingerprint: str, artifact_cls: type) -> Optional[object]:
+        """
+        Returns the artifact recorded for this fingerprint when its output files are still the ones it produced
+        """
+        try:
+            record_file_path = os.path.join(self.stage_fingerprint_dir, stage_name, f"{fingerprint}.yaml")
+            if not os.path.exists(record_file_path):
+                return None
+            record = read_yaml_file(file_path=record_file_path)
+            for path, digest in record["output_digests"].items():
+                if not os.path.isfile(path) or get_file_digest(path) != digest:
+                    logging.info(f"Output {path} of {stage_name} stage changed since fingerprint {fingerprint}")
+                    return None
+            return self.build_artifact(artifact_cls, record["artifact"])
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def save_stage_artifact(self, stage_name: str, fingerprint: str, artifact: object) -> None:
+        """
+        Records the artifact under its fingerprint once its output files are written
+        """
+        def write_record(record_file_path: str, artifact: object) -> None:
+            write_yaml_file(file_path=record_file_path, content={
+                "artifact": json.loads(json.dumps(asdict(artifact))),
+                "output_digests": self.get_artifact_file_digests(artifact),
+            })
+
+        try:
+            record_file_path = os.path.join(self.stage_fingerprint_dir, stage_name, f"{fingerprint}.yaml")
+            self.artifact_cache.put(record_file_path, artifact, write_record)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def run_stage(self, stage_name: str, input_artifact: object, config: object, yaml_file_paths: List[str],
+                  artifact_cls: type, start_stage: Callable[[], object]) -> object:
+        """
+        Runs a stage unless an artifact with the fingerprint of its inputs already exists under artifacts/
+        """
+        try:
+            fingerprint = self.get_stage_fingerprint(stage_name, input_artifact, config, yaml_file_paths)
+            artifact = self.load_stage_artifact(stage_name, fingerprint, artifact_cls)
+            if artifact is not None:
+                logging.info(f"Skipping {stage_name} stage, found artifact for fingerprint {fingerprint}: {artifact}")
+                return artifact
+            artifact = start_stage()
+            self.save_stage_artifact(stage_name, fingerprint, artifact)
+            return artifact
+        except Exception as e:
+            raise CustomException(e, sys)
+
     def start_data_ingestion(self)->DataIngestionArtifact:
         try:
             logging.info("Entered the start_data_ingestion method of TrainPipeline class")
-            data_ingestion = DataIngestion(data_ingestion_config=self.data_ingestion_config)
+            data_ingestion = DataIngestion(data_ingestion_config=self.data_ingestion_config,
+                                           artifact_cache=self.artifact_cache)
             data_ingestion_artifact = data_ingestion.initiate_data_ingestion()
             logging.info("Exited the start_data_ingestion method of TrainPipeline class")
             return data_ingestion_artifact
@@ -34,7 +137,7 @@ class TrainPipeline:
         try:
             logging.info("Entered the start_data_validation method of TrainPipeline class")
             data_validation = DataValidation(data_ingestion_artifact=data_ingestion_artifact,
-            data_validation_config=self.data_validation_config)
+            data_validation_config=self.data_validation_config, artifact_cache=self.artifact_cache)
             data_validation_artifact = data_validation.initiate_data_validation()
             logging.info("Exited the start_data_validation method of TrainPipeline class")
             return data_validation_artifact
@@ -45,7 +148,7 @@ class TrainPipeline:
         try:
             logging.info("Entered the start_transformation method of TrainPipeline class")
             data_transformation = DataTransformation(data_ingestion_artifact=data_ingestion_artifact,
-            data_transformation_config=self.data_transformation_config)
+            data_transformation_config=self.data_transformation_config, artifact_cache=self.artifact_cache)
             data_transformation_artifact =  data_transformation.initiate_data_transformation()
             logging.info("Exited the start_transformation method of TrainPipeline class")
             return data_transformation_artifact
@@ -55,7 +158,8 @@ class TrainPipeline:
     def start_model_trainer(self, data_transformation_artifact: DataTransformationArtifact) -> ModelTrainerArtifact:
         try:
             model_trainer = ModelTrainer(data_transformation_artifact=data_transformation_artifact,
-                                         model_trainer_config=self.model_trainer_config)
+                                         model_trainer_config=self.model_trainer_config,
+                                         artifact_cache=self.artifact_cache)
             model_trainer_artifact = model_trainer.initiate_model_trainer()
             return model_trainer_artifact
 
@@ -67,7 +171,8 @@ class TrainPipeline:
         try:
             model_evaluation = ModelEvaluation(model_eval_config=self.model_evaluation_config,
                                                data_ingestion_artifact=data_ingestion_artifact,
-                                               model_trainer_artifact=model_trainer_artifact)
+                                               model_trainer_artifact=model_trainer_artifact,
+                                               artifact_cache=self.artifact_cache)
             model_evaluation_artifact = model_evaluation.initiate_model_evaluation()
             return model_evaluation_artifact
         except Exception as e:
@@ -76,7 +181,8 @@ class TrainPipeline:
     def start_model_pusher(self, model_trainer_artifact: ModelTrainerArtifact):
         try:
             model_pusher = ModelPusher(model_trainer_artifact=model_trainer_artifact,
-                                       model_pusher_config=self.model_pusher_config
+                                       model_pusher_config=self.model_pusher_config,
+                                       artifact_cache=self.artifact_cache
                                        )
             model_pusher_artifact = model_pusher.initiate_model_pusher()
             return model_pusher_artifact
@@ -85,13 +191,36 @@ class TrainPipeline:
 
     
     def run_pipeline(self):
-        data_ingestion_artifact = self.start_data_ingestion()
-        data_validation_artifact = self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
-        if data_validation_artifact.validation_status:
-            data_transformation_artifact = self.start_transformation(data_ingestion_artifact=data_ingestion_artifact)
-            model_trainer_artifact = self.start_model_trainer(data_transformation_artifact=data_transformation_artifact)
+        """
+        Runs every stage with one shared artifact cache, so each dataset is parsed from disk once
+        and the artifact files are written behind while the next stage runs.
+        Validation, transformation and training are skipped when their inputs are unchanged; ingestion
+        syncs with mongodb and evaluation and push compare against the s3 registry, so they always run.
+        """
+        self.artifact_cache = ArtifactCache()
+        try:
+            data_ingestion_artifact = self.start_data_ingestion()
+            data_validation_artifact = self.run_stage(
+                "data_validation", data_ingestion_artifact, self.data_validation_config, [SCHEMA_FILE_PATH],
+                DataValidationArtifact, lambda: self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact))
+            if data_validation_artifact.validation_status:
+                data_transformation_artifact = self.run_stage(
+                    "data_transformation", data_ingestion_artifact, self.data_transformation_config, [SCHEMA_FILE_PATH],
+                    DataTransformationArtifact, lambda: self.start_transformation(data_ingestion_artifact=data_ingestion_artifact))
+                model_trainer_artifact = self.run_stage(
+                    "model_trainer", data_transformation_artifact, self.model_trainer_config,
+                    [self.model_trainer_config.model_config_file_path], ModelTrainerArtifact,
+                    lambda: self.start_model_trainer(data_transformation_artifact=data_transformation_artifact))
 
-            model_evaluation_artifact = self.start_model_evaluation(data_ingestion_artifact=data_ingestion_artifact,
-                                                                    model_trainer_artifact=model_trainer_artifact)
+                model_evaluation_artifact = self.start_model_evaluation(data_ingestion_artifact=data_ingestion_artifact,
+                                                                        model_trainer_artifact=model_trainer_artifact)
 
-            model_pusher_artifact = self.start_model_pusher(model_trainer_artifact=model_trainer_artifact)
\ No newline at end of file
+                model_pusher_artifact = self.start_model_pusher(model_trainer_artifact=model_trainer_artifact)
+        except Exception:
+            # a failed flush must not hide the error of the stage
+            try:
+                self.artifact_cache.close()
+            except Exception:
+                logging.exception("Pending artifact writes failed after a pipeline stage failed")
+            raise
+        self.artifact_cache.close()
\ No newline at end of file
@@ -1,9 +1,16 @@
 import os,sys
+import json
+import hashlib
 import yaml
 import dill
 import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import IO, Iterable, List, Optional, Union
 from src.forest.logger import logging
 from src.forest.exception import CustomException
+from src.forest.utils.model_serialization import MODEL_FILE_MAGIC, is_model_file, load_model_bytes, load_model_object
 
 def read_yaml_file(file_path: str) -> dict:
     try:
@@ -13,6 +20,183 @@ def read_yaml_file(file_path: str) -> dict:
     except Exception as e:
         raise CustomException(e, sys) from e
 
+def get_schema_dtypes(schema_config: dict) -> dict:
+    """
+    Flatten the columns section of schema.yaml into a column name -> dtype mapping
+    schema_config: dict parsed schema.yaml
+    return: dict of column name to dtype name
+    """
+    try:
+        return {name: dtype for column in schema_config["columns"] for name, dtype in column.items()}
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+def get_arrow_type(dtype: str) -> pa.DataType:
+    """
+    Arrow storage type of a schema.yaml dtype
+    Category columns are stored with their integer codes and cast back on read
+    """
+    if dtype in ("int", "category"):
+        return pa.int64()
+    return pa.from_numpy_dtype(np.dtype(dtype))
+
+def cast_to_schema_dtypes(dataframe: pd.DataFrame, schema_config: dict) -> pd.DataFrame:
+    """
+    Cast the columns of dataframe to the compact dtypes of schema.yaml
+    Integer columns holding NaN are left as float so the missing values survive
+    """
+    try:
+        for column, dtype in get_schema_dtypes(schema_config).items():
+            if column not in dataframe.columns or dtype == "int":
+                continue
+            if dtype == "category":
+                if not isinstance(dataframe[column].dtype, pd.CategoricalDtype):
+                    dataframe[column] = dataframe[column].astype("category")
+            elif dataframe[column].dtype != dtype and not dataframe[column].isna().any():
+                dataframe[column] = dataframe[column].astype(dtype)
+        return dataframe
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+def read_dataframe(file_path: str, columns: Optional[List[str]] = None, schema_config: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Read a parquet or csv dataset file
+    file_path: str location of file to read, the format follows the file extension
+    columns: only these columns are read, parquet files never touch the other columns on disk
+    schema_config: when given, columns are cast to the dtypes of schema.yaml
+    return: pd.DataFrame
+    """
+    try:
+        if file_path.endswith(".parquet"):
+            dataframe = pd.read_parquet(file_path, columns=columns)
+        else:
+            dataframe = pd.read_csv(file_path, usecols=columns)
+            if columns is not None:
+                dataframe = dataframe[columns]
+        if schema_config is not None:
+            dataframe = cast_to_schema_dtypes(dataframe, schema_config)
+        return dataframe
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+def read_dataset(file_paths: List[str], columns: Optional[List[str]] = None, schema_config: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Read the partition files of a dataset and concatenate them in order into one dataframe
+    """
+    try:
+        dataframe = pd.concat([read_dataframe(file_path, columns=columns) for file_path in file_paths], ignore_index=True)
+        if schema_config is not None:
+            dataframe = cast_to_schema_dtypes(dataframe, schema_config)
+        return dataframe
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+def write_dataframe(file_path: str, dataframe: pd.DataFrame) -> None:
+    """
+    Write a dataset file as parquet or csv depending on the file extension
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        if file_path.endswith(".parquet"):
+            dataframe.to_parquet(file_path, index=False)
+        else:
+            dataframe.to_csv(file_path, index=False, header=True)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+def check_integer_fields(chunk: pd.DataFrame, arrow_schema: pa.Schema, row_offset: int = 0) -> None:
+    """
+    Raise a ValueError naming the column and first row when a numeric column of chunk holds values its
+    integer field of arrow_schema can not store, before a safe cast fails halfway through a file
+    row_offset: number of rows written before chunk, so rows are numbered within the whole file
+    """
+    for field in arrow_schema:
+        if not pa.types.is_integer(field.type) or field.name not in chunk.columns:
+            continue
+        values = chunk[field.name].to_numpy()
+        target = np.dtype(field.type.to_pandas_dtype())
+        if values.dtype.kind not in "iuf" or values.dtype == target:
+            continue
+        info = np.iinfo(target)
+        with np.errstate(invalid="ignore"):
+            invalid = (values < info.min) | (values > info.max)
+            if values.dtype.kind == "f":
+                invalid |= np.not_equal(values, np.floor(values)) & ~np.isnan(values)
+        rows = np.flatnonzero(invalid)
+        if len(rows):
+            raise ValueError(f"Column {field.name} has {len(rows)} values not representable as {field.type}, "
+                             f"first at row {row_offset + rows[0]}: {values[rows[0]]}")
+
+def write_dataframe_chunks(file_path: Union[str, IO], chunks: Iterable[pd.DataFrame], schema_config: dict,
+                           file_format: Optional[str] = None) -> int:
+    """
+    Stream dataframe chunks into one parquet or csv file, parquet chunks become row groups
+    of a single file whose column types come from schema.yaml
+    file_path: path of the file, or a writable file object such as an S3 multipart upload
+    file_format: "parquet" or "csv", by default the file extension decides
+    return: number of rows written, nothing is written for an empty iterable
+    """
+    try:
+        if isinstance(file_path, str):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            if file_format is None:
+                file_format = "parquet" if file_path.endswith(".parquet") else "csv"
+        schema_dtypes = get_schema_dtypes(schema_config)
+        n_rows = 0
+        writer = None
+        arrow_schema = None
+        try:
+            for chunk in chunks:
+                if file_format != "parquet":
+                    chunk.to_csv(file_path, mode="a" if n_rows else "w", index=False, header=not n_rows)
+                else:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        arrow_schema = pa.schema([
+                            pa.field(field.name, get_arrow_type(schema_dtypes[field.name])
+                                     if field.name in schema_dtypes else field.type)
+                            for field in table.schema
+                        ])
+                        writer = pq.ParquetWriter(file_path, arrow_schema)
+                    check_integer_fields(chunk, arrow_schema, row_offset=n_rows)
+                    writer.write_table(table.cast(arrow_schema))
+                n_rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        return n_rows
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+_FILE_DIGESTS: dict = {}
+
+def get_file_digest(file_path: str) -> str:
+    """
+    sha256 of the file content, memoized on the path, size and modification time of the file
+    """
+    try:
+        stat = os.stat(file_path)
+        key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        digest = _FILE_DIGESTS.get(key)
+        if digest is None:
+            sha256 = hashlib.sha256()
+            with open(file_path, "rb") as file_obj:
+                for block in iter(lambda: file_obj.read(1 << 20), b""):
+                    sha256.update(block)
+            digest = _FILE_DIGESTS[key] = sha256.hexdigest()
+        return digest
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+def compute_fingerprint(*parts: object) -> str:
+    """
+    sha256 of the json serialization of parts, dict keys are sorted so equal content gives equal fingerprints
+    """
+    try:
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
 def write_yaml_file(file_path: str, content: object, replace: bool = False) -> None:
     try:
         if replace:
@@ -64,13 +248,50 @@ def load_numpy_array_data(file_path: str) -> np.array:
         raise CustomException(e, sys) from e
 
 
+def save_split_indices(file_path: str, train_index: np.ndarray, test_index: np.ndarray, fingerprint: str) -> None:
+    """
+    Save the row positions of a train/test split together with the fingerprint of the data it was computed on
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as file_obj:
+            np.savez(file_obj, train=train_index, test=test_index, fingerprint=np.array(fingerprint))
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+def load_split_indices(file_path: str) -> dict:
+    """
+    load the train/test row positions saved by save_split_indices
+    return: dict with train and test index arrays and the fingerprint string
+    """
+    try:
+        with np.load(file_path) as data:
+            return {"train": data["train"], "test": data["test"], "fingerprint": str(data["fingerprint"])}
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def loads_object(content: bytes) -> object:
+    """
+    Deserialize the content of a file written by save_object or save_model_object
+    """
+    try:
+        if content[:len(MODEL_FILE_MAGIC)] == MODEL_FILE_MAGIC:
+            return load_model_bytes(content)
+        return dill.loads(content)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
 def load_object(file_path: str) -> object:
     logging.info("Entered the load_object method of MainUtils class")
 
     try:
-
-        with open(file_path, "rb") as file_obj:
-            obj = dill.load(file_obj)
+        if is_model_file(file_path):
+            obj = load_model_object(file_path)
+        else:
+            with open(file_path, "rb") as file_obj:
+                obj = dill.load(file_obj)
 
         logging.info("Exited the load_object method of MainUtils class")
 
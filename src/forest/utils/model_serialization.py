@@ -0,0 +1,234 @@
+import io
+import os
+import sys
+import json
+import mmap
+import zlib
+import struct
+import pickle
+import tempfile
+import numpy as np
+from typing import Dict, List, Optional, Set, Union
+from src.forest.exception import CustomException
+from src.forest.logger import logging
+
+"""
+Compact model file format
+
+    MODEL_FILE_MAGIC | uint64 header length | JSON header | padding | segments
+
+The object is pickled with every numeric numpy array taken out of the pickle stream. Arrays of the same
+dtype are laid end to end in one flat buffer segment, e.g. the node arrays of all the trees of a forest
+form a single buffer and so do their value arrays, and the pickle only keeps (buffer, offset, shape)
+references to them. Segments start on 64 byte boundaries and are optionally zlib compressed, uncompressed
+segments of a memory mapped file are read as zero copy views. Arrays of decompressed or in memory content
+are views as well unless smaller than MODEL_FILE_COPY_MAX_NBYTES, small arrays like the scaler statistics
+are copied out so they do not keep the whole content alive once the trees have copied their node arrays.
+"""
+
+MODEL_FILE_MAGIC: bytes = b"FORESTM1"
+MODEL_FILE_ALIGNMENT: int = 64
+MODEL_FILE_COPY_MAX_NBYTES: int = 1 << 16
+_HEADER_LENGTH = struct.Struct("<Q")
+
+
+def _align(offset: int) -> int:
+    return -(-offset // MODEL_FILE_ALIGNMENT) * MODEL_FILE_ALIGNMENT
+
+
+class _ArrayExtractingPickler(pickle.Pickler):
+    """
+    Pickler that swaps numeric ndarrays for references into per dtype flat buffers
+    """
+
+    def __init__(self, file, **kwargs):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL, **kwargs)
+        self.buffers: Dict[str, List[np.ndarray]] = {}
+        self.buffer_sizes: Dict[str, int] = {}
+        self.dtypes: Dict[str, np.dtype] = {}
+
+    def persistent_id(self, obj):
+        if type(obj) is not np.ndarray or obj.dtype.hasobject:
+            return None
+        array = np.ascontiguousarray(obj)
+        key = array.dtype.str if array.dtype.fields is None else repr(np.lib.format.dtype_to_descr(array.dtype))
+        self.dtypes.setdefault(key, array.dtype)
+        offset = self.buffer_sizes.get(key, 0)
+        self.buffers.setdefault(key, []).append(array)
+        self.buffer_sizes[key] = offset + array.nbytes
+        return key, offset, array.shape
+
+
+class _ArrayRestoringUnpickler(pickle.Unpickler):
+    """
+    Unpickler that resolves the buffer references of _ArrayExtractingPickler as views of the loaded buffers
+    """
+
+    def __init__(self, file, buffers: Dict[str, object], dtypes: Dict[str, np.dtype], views: Set[str]):
+        super().__init__(file)
+        self.buffers = buffers
+        self.dtypes = dtypes
+        self.views = views
+
+    def persistent_load(self, pid):
+        key, offset, shape = pid
+        dtype = self.dtypes[key]
+        count = int(np.prod(shape, dtype=np.int64))
+        array = np.frombuffer(self.buffers[key], dtype=dtype, count=count, offset=offset).reshape(shape)
+        if key in self.views or array.nbytes > MODEL_FILE_COPY_MAX_NBYTES:
+            return array
+        return array.copy()
+
+
+def dump_model_bytes(obj: object, compress: bool = False, compression_level: int = 6) -> bytes:
+    """
+    Method Name :   dump_model_bytes
+    Description :   This method serializes obj in the compact model file format
+
+    Output      :   Content of the model file
+    On Failure  :   Write an exception log and then raise an exception
+    """
+    try:
+        skeleton = io.BytesIO()
+        pickler = _ArrayExtractingPickler(skeleton)
+        pickler.dump(obj)
+
+        segments = [("skeleton", skeleton.getvalue(), False)]
+        for key, arrays in pickler.buffers.items():
+            data = b"".join(array.tobytes() for array in arrays)
+            segments.append((key, data, compress))
+
+        segment_headers, payloads = [], []
+        for key, data, compressed in segments:
+            raw_nbytes = len(data)
+            if compressed:
+                data = zlib.compress(data, compression_level)
+            segment_headers.append({"key": key, "nbytes": len(data), "raw_nbytes": raw_nbytes,
+                                    "compression": "zlib" if compressed else None})
+            payloads.append(data)
+
+        header = {
+            "version": 1,
+            "dtypes": {key: np.lib.format.dtype_to_descr(dtype) for key, dtype in pickler.dtypes.items()},
+            "segments": segment_headers,
+        }
+        # segment offsets depend on the header length, so they are fixed up after a first encoding
+        header_bytes = b""
+        for _ in range(3):
+            offset = _align(len(MODEL_FILE_MAGIC) + _HEADER_LENGTH.size + len(header_bytes))
+            for segment_header, data in zip(segment_headers, payloads):
+                segment_header["offset"] = offset
+                offset = _align(offset + len(data))
+            header_bytes = json.dumps(header).encode()
+
+        content = bytearray(offset)
+        content[:len(MODEL_FILE_MAGIC)] = MODEL_FILE_MAGIC
+        content[len(MODEL_FILE_MAGIC):len(MODEL_FILE_MAGIC) + _HEADER_LENGTH.size] = _HEADER_LENGTH.pack(len(header_bytes))
+        start = len(MODEL_FILE_MAGIC) + _HEADER_LENGTH.size
+        content[start:start + len(header_bytes)] = header_bytes
+        if start + len(header_bytes) > segment_headers[0]["offset"]:
+            raise ValueError("Model file header overlaps its first segment")
+        for segment_header, data in zip(segment_headers, payloads):
+            content[segment_header["offset"]:segment_header["offset"] + len(data)] = data
+        return bytes(content)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def load_model_bytes(content: Union[bytes, bytearray, memoryview, mmap.mmap]) -> object:
+    """
+    Method Name :   load_model_bytes
+    Description :   This method rebuilds an object from the content of a compact model file,
+                    uncompressed arrays are read only views of content
+
+    Output      :   The deserialized object
+    On Failure  :   Write an exception log and then raise an exception
+    """
+    try:
+        view = memoryview(content)
+        if bytes(view[:len(MODEL_FILE_MAGIC)]) != MODEL_FILE_MAGIC:
+            raise ValueError("Not a compact model file")
+        start = len(MODEL_FILE_MAGIC) + _HEADER_LENGTH.size
+        (header_length,) = _HEADER_LENGTH.unpack(view[len(MODEL_FILE_MAGIC):start])
+        header = json.loads(bytes(view[start:start + header_length]))
+
+        buffers, views = {}, set()
+        for segment in header["segments"]:
+            data = view[segment["offset"]:segment["offset"] + segment["nbytes"]]
+            if segment["compression"] == "zlib":
+                data = zlib.decompress(data)
+            elif isinstance(content, mmap.mmap):
+                views.add(segment["key"])
+            buffers[segment["key"]] = data
+        dtypes = {key: np.lib.format.descr_to_dtype(_as_descr(descr)) for key, descr in header["dtypes"].items()}
+
+        return _ArrayRestoringUnpickler(io.BytesIO(buffers.pop("skeleton")), buffers, dtypes, views).load()
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def _as_descr(descr: object) -> object:
+    """
+    JSON turns the tuples of a structured dtype descr into lists, descr_to_dtype needs them back as tuples
+    """
+    if isinstance(descr, list):
+        return [tuple(_as_descr(item) for item in field) for field in descr]
+    return descr
+
+
+def is_model_file(file_path: str) -> bool:
+    with open(file_path, "rb") as file_obj:
+        return file_obj.read(len(MODEL_FILE_MAGIC)) == MODEL_FILE_MAGIC
+
+
+def save_model_object(file_path: str, obj: object, compress: bool = False) -> None:
+    """
+    Method Name :   save_model_object
+    Description :   This method writes obj to file_path in the compact model file format
+
+    Output      :   None
+    On Failure  :   Write an exception log and then raise an exception
+    """
+    logging.info("Entered the save_model_object method of MainUtils class")
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        # the file may be memory mapped by a loaded model, truncating it in place could crash the reader,
+        # so the new content is written aside and swapped in with a rename that keeps the old inode mapped
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), prefix=".model-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file_obj:
+                file_obj.write(dump_model_bytes(obj, compress=compress))
+            # mkstemp creates the file readable by its owner only, model files stay readable like before
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        logging.info("Exited the save_model_object method of MainUtils class")
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def load_model_object(file_path: str, use_mmap: bool = True) -> object:
+    """
+    Method Name :   load_model_object
+    Description :   This method loads a compact model file, memory mapped unless use_mmap is False.
+                    The map stays open for as long as arrays of the model reference it. Estimators like
+                    the sklearn trees copy their arrays while unpickling, so the pages read during the
+                    load are dropped afterwards and only faulted back in for the arrays still mapped.
+
+    Output      :   The deserialized object
+    On Failure  :   Write an exception log and then raise an exception
+    """
+    logging.info("Entered the load_model_object method of MainUtils class")
+    try:
+        with open(file_path, "rb") as file_obj:
+            content: Optional[object] = mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ) if use_mmap \
+                else file_obj.read()
+        obj = load_model_bytes(content)
+        if use_mmap and hasattr(mmap, "MADV_DONTNEED"):
+            content.madvise(mmap.MADV_DONTNEED)
+        logging.info("Exited the load_model_object method of MainUtils class")
+        return obj
+    except Exception as e:
+        raise CustomException(e, sys) from e